@@ -1,4 +1,6 @@
 // functions/api/[[path]].js
+import { createRateLimiter } from "../lib/ratelimit.js";
+
 export async function onRequest(context) {
     const { request, env } = context;
     const url = new URL(request.url);
@@ -146,7 +148,7 @@ async function handleRecord(request, env, url, corsHeaders) {
         });
     }
 
-    const normalizedKeyword = keyword.trim().toLowerCase();
+    const normalizedKeyword = normalizeText(keyword);
 
     // 检查关键词长度
     if (normalizedKeyword.length > 100) {
@@ -364,29 +366,27 @@ async function handleGap(env, corsHeaders) {
             if (count < THRESHOLD) return;
 
             const keyword = word.trim();
+            const query = normalizeText(keyword);
 
-            // 是否命中任何资源
+            // 是否命中任何资源（比较 data.json 中预先规范化的字段）
             const matched = dataList.some(item => {
                 // 如果有 search_aliases，用别名匹配（双向匹配）
-                if (Array.isArray(item.search_aliases) && item.search_aliases.length > 0) {
-                    return item.search_aliases.some(alias =>
-                        keyword.includes(alias) || alias.includes(keyword)
+                const aliases = normField(item, "search_aliases");
+                if (aliases.length > 0) {
+                    return aliases.some(alias =>
+                        query.includes(alias) || alias.includes(query)
                     );
                 }
 
                 // 没有别名时，用 title 匹配
-                if (item.title && item.title.includes(keyword)) {
+                if (normField(item, "title").includes(query)) {
                     return true;
                 }
 
                 // keywords 模糊匹配
-                if (Array.isArray(item.keywords)) {
-                    return item.keywords.some(k =>
-                    keyword.includes(k) || k.includes(keyword)
-                    );
-                }
-
-                return false;
+                return normField(item, "keywords").some(k =>
+                    query.includes(k) || k.includes(query)
+                );
             });
 
             // ❌ 没命中 → 资源缺口
@@ -503,10 +503,19 @@ async function handlePing(corsHeaders) {
  *  防刷机制：IP频率限制 + 关键词限制
   = *=========================================================== */
 
-const RATE_LIMIT = {
-    MAX_REQUESTS: 3,
-    WINDOW_MS: 60 * 60 * 1000
-};
+// 每个 IP 每小时 3 次（令牌桶：容量 3，每 20 分钟补充 1 个）
+const ipLimiter = createRateLimiter({
+    prefix: "ratelimit:",
+    capacity: 3,
+    refillMs: 20 * 60 * 1000
+});
+
+// 同一关键词每天 1 次
+const keywordLimiter = createRateLimiter({
+    prefix: "keyword_req:",
+    capacity: 1,
+    refillMs: 24 * 60 * 60 * 1000
+});
 
 function getClientIP(request) {
     return request.headers.get('CF-Connecting-IP') || 
@@ -514,48 +523,6 @@ function getClientIP(request) {
            'unknown';
 }
 
-async function checkRateLimit(env, clientIP, corsHeaders) {
-    const key = `ratelimit:${clientIP}`;
-    const now = Date.now();
-    
-    let record = await env.SEARCH_STATS.get(key);
-    if (record) {
-        const { count, windowStart } = JSON.parse(record);
-        
-        if (now - windowStart > RATE_LIMIT.WINDOW_MS) {
-            await env.SEARCH_STATS.put(key, JSON.stringify({ count: 1, windowStart: now }));
-            return { allowed: true };
-        }
-        
-        if (count >= RATE_LIMIT.MAX_REQUESTS) {
-            return { allowed: false, remainingTime: Math.ceil((windowStart + RATE_LIMIT.WINDOW_MS - now) / 1000 / 60) };
-        }
-        
-        await env.SEARCH_STATS.put(key, JSON.stringify({ count: count + 1, windowStart }));
-        return { allowed: true };
-    }
-    
-    await env.SEARCH_STATS.put(key, JSON.stringify({ count: 1, windowStart: now }));
-    return { allowed: true };
-}
-
-async function checkKeywordLimit(env, keyword, corsHeaders) {
-    const key = `keyword_req:${keyword.toLowerCase()}`;
-    const now = Date.now();
-    const DAY_MS = 24 * 60 * 60 * 1000;
-    
-    const record = await env.SEARCH_STATS.get(key);
-    if (record) {
-        const { lastRequest } = JSON.parse(record);
-        if (now - lastRequest < DAY_MS) {
-            return { allowed: false };
-        }
-    }
-    
-    await env.SEARCH_STATS.put(key, JSON.stringify({ lastRequest: now }));
-    return { allowed: true };
-}
-
 async function handleRequest(request, env, corsHeaders) {
 
     if (request.method !== "POST") {
@@ -594,18 +561,18 @@ async function handleRequest(request, env, corsHeaders) {
     }
 
     const clientIP = getClientIP(request);
-    const rateLimitResult = await checkRateLimit(env, clientIP, corsHeaders);
+    const rateLimitResult = await ipLimiter.take(env.SEARCH_STATS, clientIP);
     if (!rateLimitResult.allowed) {
         return new Response(JSON.stringify({
             success: false,
-            error: `请求过于频繁，请${rateLimitResult.remainingTime}分钟后再试`
+            error: `请求过于频繁，请${Math.ceil(rateLimitResult.retryAfterMs / 1000 / 60)}分钟后再试`
         }), {
             status: 429,
             headers: { "Content-Type": "application/json; charset=utf-8", ...corsHeaders }
         });
     }
 
-    const keywordLimitResult = await checkKeywordLimit(env, keyword, corsHeaders);
+    const keywordLimitResult = await keywordLimiter.take(env.SEARCH_STATS, keyword.toLowerCase());
     if (!keywordLimitResult.allowed) {
         return new Response(JSON.stringify({
             success: false,
@@ -680,6 +647,20 @@ async function handleRequest(request, env, corsHeaders) {
 
 
 // 辅助函数
+
+// 搜索文本规范化：NFKC + 小写 + 空白折叠（规则见 scripts/normalize.py，三处实现需保持一致）
+function normalizeText(s) {
+    return String(s || "").normalize("NFKC").toLowerCase()
+        .replace(/[\t\n\v\f\r \u0085\u1680\u2028\u2029\ufeff]+/g, " ").trim();
+}
+
+// data.json 中 norm 只保存与原文不同的字段，缺失时使用原字段
+function normField(item, field) {
+    const value = (item.norm && item.norm[field]) || item[field];
+    if (field === "title") return typeof value === "string" ? value : "";
+    return Array.isArray(value) ? value : [];
+}
+
 function getHotLevel(count) {
     if (count >= 100) return "🔥🔥🔥";
     if (count >= 50) return "🔥🔥";
@@ -0,0 +1,138 @@
+// functions/lib/ratelimit.js
+/* ============================================================
+ *  令牌桶限流（/api/request 使用）
+ *  - 桶状态缓存在 isolate 内的 LRU 中，命中缓存时不读 KV
+ *  - 同一个 key 冷启动时只读一次 KV，并发请求共用同一个加载中的状态
+ *  - 同一个 key 每个 flushMs 窗口最多写一次 KV，令牌耗尽时立即写入，被拒绝的请求不写 KV
+ *  - 被 LRU 淘汰的桶如有未写入的变化，淘汰时写入 KV，写完之前仍以内存中的状态为准
+ *  - 同一个 key 的写入排队依次进行，轮到时才读取桶的当前状态，后写入的总是最新状态；
+ *    写入失败（KV 同一 key 每秒只允许写一次）时等 retryMs 重试，仍失败则留到下一次请求（包括被拒绝的）再写
+ *  - KV 记录使用 expirationTtl 自动过期（桶装满所需的时间），不再手动比较时间戳
+ *  Python 参考实现: scripts/ratelimit.py
+ * ============================================================ */
+
+const KV_MIN_TTL_SECONDS = 60;
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+export function createRateLimiter({
+    prefix, capacity, refillMs, flushMs = 60 * 1000, cacheSize = 1000, retryMs = 1000, writeRetries = 1,
+}) {
+    // key → { tokens, updated, flushed, version, saved }；Map 按插入顺序，重新插入即移到末尾
+    // version 每次放行加一，saved 是已写入 KV 的 version，不相等说明有未写入的变化
+    const cache = new Map();
+    // key → 正在从 KV 读取的 Promise，避免冷 key 上的并发请求各自拿到一个满桶
+    const loading = new Map();
+    // 被淘汰但变化还没写入 KV 的桶
+    const unsaved = new Map();
+    let evicted = [];
+    // key → 该 key 最后一次排队的写入
+    const writing = new Map();
+
+    function remember(key, state) {
+        cache.delete(key);
+        cache.set(key, state);
+        if (cache.size > cacheSize) {
+            const [oldKey, oldState] = cache.entries().next().value;
+            cache.delete(oldKey);
+            if (oldState.version !== oldState.saved) {
+                unsaved.set(oldKey, oldState);
+                evicted.push([oldKey, oldState]);
+            }
+        }
+    }
+
+    async function load(kv, key, now) {
+        const cached = cache.get(key) || unsaved.get(key);
+        if (cached) return cached;
+
+        let pending = loading.get(key);
+        if (!pending) {
+            pending = read(kv, key, now).then(state => {
+                loading.delete(key);
+                remember(key, state);
+                return state;
+            });
+            loading.set(key, pending);
+        }
+        return pending;
+    }
+
+    async function read(kv, key, now) {
+        let state = null;
+        try {
+            state = await kv.get(prefix + key, { type: "json" });
+        } catch (e) {
+            console.error("读取限流状态失败:", e);
+        }
+        if (!state || typeof state.tokens !== "number") {
+            return { tokens: capacity, updated: now, flushed: null, version: 0, saved: 0 };
+        }
+        return { tokens: state.tokens, updated: state.updated, flushed: null, version: 0, saved: 0 };
+    }
+
+    function flush(kv, key, state) {
+        const next = (writing.get(key) || Promise.resolve()).then(() => write(kv, key, state));
+        writing.set(key, next);
+        return next.finally(() => {
+            if (writing.get(key) === next) writing.delete(key);
+        });
+    }
+
+    async function write(kv, key, state) {
+        for (let attempt = 0; ; attempt++) {
+            // 轮到这次写入时才读取状态，排在前面的慢写入不会覆盖更新的状态
+            const { tokens, updated, version } = state;
+            if (version === state.saved) return;
+            const ttl = Math.max(KV_MIN_TTL_SECONDS, Math.ceil((capacity - tokens) * refillMs / 1000));
+            try {
+                await kv.put(prefix + key, JSON.stringify({ tokens, updated }), { expirationTtl: ttl });
+            } catch (e) {
+                if (attempt < writeRetries) {
+                    await sleep(retryMs);
+                    continue;
+                }
+                console.error("保存限流状态失败:", e);
+                return;
+            }
+            state.saved = version;
+            if (state.version === state.saved && unsaved.get(key) === state) {
+                unsaved.delete(key);
+            }
+            return;
+        }
+    }
+
+    async function take(kv, key, now = Date.now()) {
+        const state = await load(kv, key, now);
+
+        // 按经过的时间补充令牌
+        state.tokens = Math.min(capacity, state.tokens + Math.max(0, now - state.updated) / refillMs);
+        state.updated = Math.max(now, state.updated);
+
+        let result;
+        let needFlush = false;
+        if (state.tokens < 1) {
+            remember(key, state);
+            // 之前的写入失败过，趁这次补写（正在写入时不必等待）
+            needFlush = state.version !== state.saved && !writing.has(key);
+            result = { allowed: false, retryAfterMs: Math.ceil((1 - state.tokens) * refillMs) };
+        } else {
+            state.tokens -= 1;
+            state.version += 1;
+            // 令牌耗尽必须写入，其他 isolate 才能看到桶已空
+            needFlush = state.flushed === null || now - state.flushed >= flushMs || state.tokens < 1;
+            if (needFlush) state.flushed = now;
+            remember(key, state);
+            result = { allowed: true, retryAfterMs: 0 };
+        }
+
+        const writes = evicted;
+        evicted = [];
+        if (needFlush) writes.unshift([key, state]);
+        await Promise.all(writes.map(([k, s]) => flush(kv, k, s)));
+        return result;
+    }
+
+    return { take };
+}
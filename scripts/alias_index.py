@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+资源匹配索引（别名 / 关键词 / 标题的双向包含查询）
+- contained(query):  哪些词出现在 query 里 —— Aho-Corasick 自动机，对 query 扫描一遍
+- containing(query): 哪些词包含 query —— 二元组（单字符查询用单字）倒排，取交集后校验
+- match(keyword):     与 match_resources（逐条扫描，gen_seo_from_stats 原有规则）结果一致
+- gap_match(query):   与 local_api.gap_matches / handleGap 结果一致（query 已规范化）
+
+索引按规范化后的字段（Resource.n_*）构建，同一个词只保存一次。
+
+与逐条扫描结果一致性的测试见 tests/test_alias_index.py；python alias_index.py 打印索引与扫描的耗时
+"""
+
+import os
+from collections import deque
+
+from normalize import normalize
+
+ALIAS, KEYWORD, TITLE = "alias", "keyword", "title"
+
+
+def match_resources(keyword, resources):
+    """逐条扫描查找关键词匹配的资源（比较预先规范化的字段，规则见 normalize.py），AliasIndex.match 的参考实现"""
+    matched_resources = []
+    keyword_norm = normalize(keyword)
+
+    for resource in resources:
+        # 如果有 search_aliases，用别名匹配（双向匹配）
+        if resource.n_aliases:
+            if any(keyword_norm in alias or alias in keyword_norm for alias in resource.n_aliases):
+                matched_resources.append(resource)
+                continue
+
+        # 没有别名时，用 title 匹配
+        if keyword_norm in resource.n_title:
+            matched_resources.append(resource)
+            continue
+
+        # 检查keywords
+        if any(keyword_norm in k for k in resource.n_keywords):
+            matched_resources.append(resource)
+            continue
+
+    return matched_resources
+
+
+class AhoCorasick:
+    """多模式串匹配，find(text) 返回 text 中出现过的模式串编号"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]  # 以该状态结尾的模式串编号（不含 fail 链上的）
+        self.out_link = [0]  # fail 链上最近一个有输出的状态，0 表示没有
+        self.empty = []  # 空串出现在任何文本中
+        for pid, pattern in enumerate(patterns):
+            if not pattern:
+                self.empty.append(pid)
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.out_link.append(0)
+                state = nxt
+            self.out[state].append(pid)
+        self._build_links()
+
+    def _build_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                fs = self.fail[nxt]
+                self.out_link[nxt] = fs if self.out[fs] else self.out_link[fs]
+
+    def find(self, text):
+        found = set(self.empty)
+        seen = set()  # 已收集过输出的状态，沿 out_link 走到这里即可停
+        state = 0
+        for ch in text:
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            s = state if self.out[state] else self.out_link[state]
+            while s and s not in seen:
+                seen.add(s)
+                found.update(self.out[s])
+                s = self.out_link[s]
+        return found
+
+
+class SubstringIndex:
+    """包含查询的倒排索引，containing(query) 返回包含 query 的词编号"""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.postings = {}
+        for tid, text in enumerate(texts):
+            grams = set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(tid)
+
+    def containing(self, query):
+        if not query:
+            return set(range(len(self.texts)))
+        if len(query) == 1:
+            return set(self.postings.get(query, ()))
+        grams = {query[i:i + 2] for i in range(len(query) - 1)}
+        lists = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return set()
+            lists.append(posting)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return candidates
+        return {tid for tid in candidates if query in self.texts[tid]}
+
+
+class AliasIndex:
+    def __init__(self, resources):
+        self.resources = list(resources)
+        texts = {}  # 规范化文本 → 编号
+        self.owners = []  # 编号 → [(字段类型, 资源下标)]
+
+        def add(text, kind, ridx):
+            tid = texts.get(text)
+            if tid is None:
+                tid = texts[text] = len(self.owners)
+                self.owners.append([])
+            self.owners[tid].append((kind, ridx))
+
+        for ridx, resource in enumerate(self.resources):
+            for alias in resource.n_aliases:
+                add(alias, ALIAS, ridx)
+            for keyword in resource.n_keywords:
+                add(keyword, KEYWORD, ridx)
+            add(resource.n_title, TITLE, ridx)
+
+        self.texts = list(texts)
+        self.substrings = SubstringIndex(self.texts)
+        # “词出现在查询里”只有别名和关键词需要（标题只做单向包含）
+        self.ac_texts = [tid for tid, owners in enumerate(self.owners)
+                         if any(kind != TITLE for kind, _ in owners)]
+        self.automaton = AhoCorasick([self.texts[tid] for tid in self.ac_texts])
+
+    def containing(self, query):
+        """包含 query 的词编号"""
+        return self.substrings.containing(query)
+
+    def contained(self, query):
+        """出现在 query 中的别名 / 关键词编号"""
+        return {self.ac_texts[pid] for pid in self.automaton.find(query)}
+
+    def _owners(self, tids, kinds):
+        return {ridx for tid in tids for kind, ridx in self.owners[tid] if kind in kinds}
+
+    def match(self, keyword):
+        """匹配关键词的资源（按目录顺序），规则同 match_resources:
+        别名双向包含，或标题 / 关键词包含 keyword"""
+        query = normalize(keyword)
+        inside = self.containing(query)
+        hits = self._owners(inside, (ALIAS, TITLE, KEYWORD))
+        hits |= self._owners(self.contained(query), (ALIAS,))
+        return [self.resources[i] for i in sorted(hits)]
+
+    def gap_match(self, query):
+        """是否有资源匹配（query 已规范化），规则同 handleGap:
+        有别名的资源只看别名（双向）；没有别名的看标题包含 query，或关键词双向包含"""
+        inside = self.containing(query)
+        outside = self.contained(query)
+        if self._owners(inside | outside, (ALIAS,)):
+            return True
+        candidates = self._owners(inside, (TITLE, KEYWORD)) | self._owners(outside, (KEYWORD,))
+        return any(not self.resources[i].n_aliases for i in candidates)
+
+
+if __name__ == "__main__":
+    import time
+
+    from catalog import load_catalog
+    from catalog_diff import load_json
+
+    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+    PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+    resources = load_catalog(os.path.join(PROJECT_ROOT, "data.json"))
+    stats = load_json(os.path.join(PROJECT_ROOT, "static/status.json"), {}).get("stats", {})
+    queries = sorted(stats) or [w for r in resources for w in r.keywords][:100]
+
+    start = time.perf_counter()
+    index = AliasIndex(resources)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    for q in queries:
+        index.match(q)
+    indexed = time.perf_counter() - start
+    start = time.perf_counter()
+    for q in queries:
+        match_resources(q, resources)
+    scanned = time.perf_counter() - start
+
+    print(f"📚 {len(resources)} 个资源，{len(index.texts)} 个词，建索引 {built * 1000:.1f} ms")
+    print(f"🔍 {len(queries)} 个查询: 索引 {indexed * 1000:.1f} ms，逐条扫描 {scanned * 1000:.1f} ms")
@@ -1,47 +1,90 @@
 import pandas as pd
 import qrcode
-import json
 import os
 import openpyxl
 
+from catalog import Resource, dump_catalog, load_catalog
+from catalog_diff import DIFF_FILE, diff_catalog, save_json
+
 # 文件路径
 xlsx_file = "../resources.xlsx"  # 根据你的目录调整
 output_json = "../data.json"
 qrcode_dir = "../static/qrcode"
 
-# 创建二维码目录
-os.makedirs(qrcode_dir, exist_ok=True)
-
-# 使用 pandas 读取 Excel（更快）
-df = pd.read_excel(xlsx_file, engine='openpyxl')
-
-data = []
-for idx, row in df.iterrows():
-    item_id = str(row.get("id", idx + 1) or idx + 1)
-    title = str(row.get("title", "") or "")
-    keywords_str = str(row.get("keywords", "") or "")
-    search_aliases_str = str(row.get("search_aliases", "") or "")
-    share_link = str(row.get("share_link", "") or "")
-
-    keywords = [k.strip() for k in keywords_str.split(",") if k.strip() and k.strip().lower() != 'nan']
-    search_aliases = [alias.strip() for alias in search_aliases_str.split(",") if alias.strip() and alias.strip().lower() != 'nan']
-
-    # 生成二维码
-    qr_path = os.path.join(qrcode_dir, f"{item_id}.png")
-    img = qrcode.make(share_link)
-    img.save(qr_path)
-
-    data.append({
-        "id": item_id,
-        "title": title,
-        "keywords": keywords,
-        "search_aliases": search_aliases,
-        "share_link": share_link,
-        "qrcode": f"static/qrcode/{item_id}.png"
-    })
-
-# 写入 JSON
-with open(output_json, "w", encoding="utf-8") as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
-
-print("data.json & QR codes generated")
+
+def read_rows(path=xlsx_file):
+    """读取 Excel，返回 Resource 列表（不生成二维码）"""
+    # 使用 pandas 读取 Excel（更快）
+    df = pd.read_excel(path, engine='openpyxl')
+
+    data = []
+    for idx, row in df.iterrows():
+        item_id = str(row.get("id", idx + 1) or idx + 1)
+        title = str(row.get("title", "") or "")
+        keywords_str = str(row.get("keywords", "") or "")
+        search_aliases_str = str(row.get("search_aliases", "") or "")
+        share_link = str(row.get("share_link", "") or "")
+
+        keywords = [k.strip() for k in keywords_str.split(",") if k.strip() and k.strip().lower() != 'nan']
+        search_aliases = [alias.strip() for alias in search_aliases_str.split(",") if alias.strip() and alias.strip().lower() != 'nan']
+
+        data.append(Resource(
+            id=item_id,
+            title=title,
+            keywords=keywords,
+            search_aliases=search_aliases,
+            share_link=share_link,
+            qrcode=f"static/qrcode/{item_id}.png"
+        ))
+    return data
+
+
+def update_qrcodes(data, diff):
+    """只为 share_link 变化（含新增）或图片缺失的资源生成二维码，删除已下架资源的二维码"""
+    # 创建二维码目录
+    os.makedirs(qrcode_dir, exist_ok=True)
+
+    link_changed = set(diff["link_changed"])
+    generated = 0
+    for item in data:
+        qr_path = os.path.join(qrcode_dir, f"{item.id}.png")
+        if item.id in link_changed or not os.path.exists(qr_path):
+            img = qrcode.make(item.share_link)
+            img.save(qr_path)
+            generated += 1
+
+    for item_id in diff["removed"]:
+        qr_path = os.path.join(qrcode_dir, f"{item_id}.png")
+        if os.path.exists(qr_path):
+            os.remove(qr_path)
+
+    return generated
+
+
+def build(previous=None):
+    """增量构建 data.json & 二维码，返回本次 diff
+
+    previous 为上一版资源列表；不传时从 data.json 读取
+    """
+    if previous is None:
+        previous = load_catalog(output_json) if os.path.exists(output_json) else []
+
+    data = read_rows()
+    diff = diff_catalog(previous, data)
+    generated = update_qrcodes(data, diff)
+
+    # 内容无变化时不重写 data.json
+    if data != previous:
+        dump_catalog(data, output_json)
+
+    # 供 gen_seo_from_stats.py 只重建受影响的页面
+    save_json(DIFF_FILE, diff, indent=2)
+
+    print(f"新增 {len(diff['added'])} / 修改 {len(diff['changed'])} / 删除 {len(diff['removed'])}，"
+          f"生成二维码 {generated} 个")
+    return data, diff
+
+
+if __name__ == "__main__":
+    build()
+    print("data.json & QR codes generated")
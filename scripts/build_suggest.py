@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+生成搜索框联想词（static/suggest/）
+- 候选词来自资源标题、关键词、搜索别名以及 /api/sync 的热搜词，全部按 normalize.py 规范化后去重
+- 热搜词与首页热搜榜规则相同：不在 FILTER_KEYWORDS 中，且能匹配到资源（AliasIndex.match）；
+  FILTER_KEYWORDS 中的词无论来源都不作为联想词
+- 按搜索次数预先排好序，每个前缀只保留前 SUGGEST_LIMIT 个
+- 按首字符拆分文件（文件名为首字符码点的十六进制），浏览器只加载输入的首字符对应的那一份
+
+每个分片: {"t": [候选词原文, ...], "p": {前缀: [t 的下标, ...]}}
+前缀最长 MAX_PREFIX 个字符，查找时取输入的前 MAX_PREFIX 个字符直接命中，
+输入更长时在该节点的候选中再按前缀过滤，单次查找只与输入长度有关。
+"""
+
+import json
+import os
+from collections import defaultdict
+
+from alias_index import AliasIndex
+from catalog import load_catalog
+from catalog_diff import load_json
+from normalize import normalize
+from stats_store import DEFAULT_DB, StatsStore
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+DATA_FILE = os.path.join(PROJECT_ROOT, "data.json")
+STATUS_FILE = os.path.join(PROJECT_ROOT, "static/status.json")
+SUGGEST_DIR = os.path.join(PROJECT_ROOT, "static/suggest")
+
+SUGGEST_LIMIT = 8
+MAX_PREFIX = 16
+
+# 不作为联想词的词，与 index.html 的 FILTER_KEYWORDS 保持一致
+FILTER_KEYWORDS = [
+    '剧本',
+    '加个v呗',
+]
+
+# 搜索次数相同时的来源优先级，数字小的靠前
+SOURCE_RANK = {"hot": 0, "title": 1, "keyword": 2, "alias": 3}
+
+
+def load_stats():
+    """最近一次统计快照（stats.db），没有时退回 status.json"""
+    if os.path.exists(DEFAULT_DB):
+        store = StatsStore(DEFAULT_DB)
+        ids = store.snapshot_ids(1)
+        stats = store.snapshot(ids[0]) if ids else {}
+        store.close()
+        if stats:
+            return stats
+    return load_json(STATUS_FILE, {}).get("stats", {})
+
+
+def collect_terms(resources, stats):
+    """返回 {规范化词: (原文, 搜索次数, 来源)}"""
+    counts = defaultdict(int)
+    for keyword, count in stats.items():
+        if isinstance(count, (int, float)):
+            counts[normalize(keyword)] += int(count)
+
+    terms = {}
+    blocked = {normalize(word) for word in FILTER_KEYWORDS}
+
+    def add(text, source):
+        key = normalize(text)
+        if not key or key in blocked:
+            return
+        old = terms.get(key)
+        if old is None or SOURCE_RANK[source] < SOURCE_RANK[old[2]]:
+            terms[key] = (text.strip(), counts.get(key, 0), source)
+
+    # 任何人反复搜索就能让一个词进入统计，只保留能匹配到资源的热搜词
+    index = AliasIndex(resources)
+    for keyword in stats:
+        if index.match(keyword):
+            add(keyword, "hot")
+    for item in resources:
+        add(item.title, "title")
+        for keyword in item.keywords:
+            add(keyword, "keyword")
+        for alias in item.search_aliases:
+            add(alias, "alias")
+    return terms
+
+
+def build_shards(terms, limit=SUGGEST_LIMIT, max_prefix=MAX_PREFIX):
+    """返回 {首字符: 分片}"""
+    ranked = sorted(
+        terms.items(),
+        key=lambda kv: (-kv[1][1], SOURCE_RANK[kv[1][2]], len(kv[0]), kv[0]),
+    )
+
+    shards = {}
+    for key, (text, _, _) in ranked:
+        shard = shards.setdefault(key[0], {"t": [], "p": {}})
+        index = len(shard["t"])
+        added = False
+        # 候选已按排名顺序加入，前缀节点满了就说明已有更靠前的候选
+        for end in range(1, min(len(key), max_prefix) + 1):
+            node = shard["p"].setdefault(key[:end], [])
+            if len(node) < limit:
+                node.append(index)
+                added = True
+        # 所有前缀都已满的词不会被联想到，不写入候选表
+        if added:
+            shard["t"].append(text)
+    return shards
+
+
+def shard_filename(ch):
+    return f"{ord(ch):x}.json"
+
+
+def write_shards(shards, output_dir=SUGGEST_DIR):
+    """只写内容有变化的分片，并删除不再需要的旧分片，返回 (写入数, 删除数)"""
+    os.makedirs(output_dir, exist_ok=True)
+    wanted = {}
+    for ch, shard in shards.items():
+        wanted[shard_filename(ch)] = json.dumps(shard, ensure_ascii=False, separators=(",", ":"))
+
+    written = 0
+    for filename, content in wanted.items():
+        path = os.path.join(output_dir, filename)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                if f.read() == content:
+                    continue
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        written += 1
+
+    removed = 0
+    for filename in os.listdir(output_dir):
+        if filename.endswith(".json") and filename not in wanted:
+            os.remove(os.path.join(output_dir, filename))
+            removed += 1
+    return written, removed
+
+
+def main():
+    resources = load_catalog(DATA_FILE)
+    stats = load_stats()
+    terms = collect_terms(resources, stats)
+    shards = build_shards(terms)
+    written, removed = write_shards(shards)
+
+    total = sum(len(s["t"]) for s in shards.values())
+    print(f"📚 候选词 {len(terms)} 个（热搜 {len(stats)} 个），保留 {total} 个")
+    print(f"🗂️ 分片 {len(shards)} 个，更新 {written} 个，删除 {removed} 个")
+    print(f"✅ 已生成: {SUGGEST_DIR}")
+
+
+if __name__ == "__main__":
+    main()
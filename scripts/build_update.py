@@ -1,19 +1,146 @@
-import pandas as pd
 import json
 import os
+import re
+from datetime import date as _date
 
-os.makedirs(".", exist_ok=True)
+update_xlsx = "../update.xlsx"
+update_json = "../update.json"
+# 首页只加载 latest.json；按日期归档的文件在日期过去后不再改写
+updates_dir = "../static/updates"
+LATEST_COUNT = 10
 
-df = pd.read_excel("../update.xlsx", engine="openpyxl")
+_DATE_RE = re.compile(r"^(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})\s*日?(?:[ T].*)?$")
 
-data = []
-for _, row in df.iterrows():
-    name = str(row.get("update_name", "")).strip()
-    date = str(row.get("update_date", "")).strip()
-    if name and name.lower() != 'nan':
+
+def format_date(value):
+    """统一为 YYYY-MM-DD，无法识别时返回 None
+
+    update.xlsx 中的日期是文本，常见 2026-02-21、2026/2/21、2026.2.21、2026年2月21日；
+    单元格被设成日期格式时读出来是 Timestamp
+    """
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    match = _DATE_RE.match(str(value).strip())
+    if not match:
+        return None
+    try:
+        return _date(*map(int, match.groups())).isoformat()
+    except ValueError:
+        return None
+
+
+def read_sheet():
+    import pandas as pd
+
+    df = pd.read_excel(update_xlsx, engine="openpyxl")
+
+    data = []
+    for i, row in df.iterrows():
+        name = str(row.get("update_name", "")).strip()
+        if not name or name.lower() == 'nan':
+            continue
+        raw = row.get("update_date", "")
+        date = format_date(raw)
+        if date is None:
+            print(f"⚠️ 第 {i + 2} 行日期无法识别，已跳过: {name} ({raw})")
+            continue
         data.append({"name": name, "date": date})
+    return data
+
+
+def load_feed(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if not isinstance(data, list):
+        return []
+    feed = []
+    for item in data:
+        if not isinstance(item, dict) or not item.get("name"):
+            continue
+        date = format_date(item.get("date", ""))
+        if date is None:
+            print(f"⚠️ update.json 中日期无法识别，已跳过: {item['name']} ({item.get('date')})")
+            continue
+        feed.append({"name": item["name"], "date": date})
+    return feed
+
+
+def merge_feed(rows, previous):
+    """合并表格与上一次的 update.json，按 (name, date) 去重，日期新的在前
+
+    表格中的条目排在同一日期的前面（日期均已由 format_date 统一格式）
+    """
+    merged = {}
+    for item in rows + previous:
+        key = (item["name"], item["date"])
+        if key not in merged:
+            merged[key] = {"name": key[0], "date": key[1]}
+    return sorted(merged.values(), key=lambda item: item["date"], reverse=True)
+
+
+def write_if_changed(path, data):
+    content = json.dumps(data, ensure_ascii=False, indent=2)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return True
+
+
+def write_archives(feed, today=None):
+    """写出 latest.json、index.json 和按日期归档的 YYYY-MM-DD.json，返回写入的文件名
+
+    已经过去的日期的归档一旦存在就不再改写，之后补进表格的该日期条目只打印警告，
+    index.json 的数量按归档文件的实际内容计算
+    """
+    today = today or _date.today().isoformat()
+    os.makedirs(updates_dir, exist_ok=True)
+
+    by_date = {}
+    for item in feed:
+        by_date.setdefault(item["date"], []).append(item)
+
+    written = []
+    counts = {}
+    for day, items in by_date.items():
+        path = os.path.join(updates_dir, f"{day}.json")
+        if day < today and os.path.exists(path):
+            sealed = load_feed(path)
+            late = [item["name"] for item in items if item not in sealed]
+            if late:
+                print(f"⚠️ {day} 的归档已封存，未写入补充的 {len(late)} 条: {', '.join(late)}")
+            counts[day] = len(sealed)
+            continue
+        if write_if_changed(path, items):
+            written.append(f"{day}.json")
+        counts[day] = len(items)
+
+    index = [{"date": day, "count": counts[day]} for day in sorted(counts, reverse=True)]
+    if write_if_changed(os.path.join(updates_dir, "index.json"), index):
+        written.append("index.json")
+    if write_if_changed(os.path.join(updates_dir, "latest.json"), feed[:LATEST_COUNT]):
+        written.append("latest.json")
+    return written
+
+
+def build():
+    """读取 update.xlsx，与已有的 update.json 合并，生成 update.json 及 static/updates/"""
+    rows = read_sheet()
+    previous = load_feed(update_json)
+    data = merge_feed(rows, previous)
+
+    write_if_changed(update_json, data)
+    written = write_archives(data)
+
+    print(f"update.json generated: {len(data)} items ({len(data) - len(previous)} new)")
+    print(f"static/updates: {', '.join(written) if written else 'no changes'}")
+    return data
 
-with open("../update.json", "w", encoding="utf-8") as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
 
-print(f"update.json generated: {len(data)} items")
+if __name__ == "__main__":
+    build()
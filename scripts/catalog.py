@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+紧凑的资源目录模型
+- Resource 使用 __slots__，数字 id 存为 int
+- 关键词、别名 intern 后共享同一个字符串对象（剧集、美剧等分类在每条资源里重复出现）
+- 夸克分享链接只保存前缀之后的部分，二维码路径由 id 推导
+- iter_resources 分块读取 data.json，不用一次性 json.load 整个文件
+- n_title / n_keywords / n_aliases 是按 normalize.py 规则预先规范化的匹配字段
+"""
+
+import json
+import sys
+
+from normalize import normalize
+
+SHARE_PREFIX = "https://pan.quark.cn/s/"
+FIELDS = ("id", "title", "keywords", "search_aliases", "share_link", "qrcode")
+
+_decoder = json.JSONDecoder()
+
+
+def _intern_all(values):
+    if isinstance(values, str):
+        values = [values]
+    return tuple(sys.intern(str(v)) for v in values or ())
+
+
+def _normalize_all(values):
+    """规范化后与原文相同时复用原元组"""
+    normalized = tuple(sys.intern(normalize(v)) for v in values)
+    return values if normalized == values else normalized
+
+
+class Resource:
+    """单个资源，支持 .get() 以兼容原先按 dict 读取字段的代码"""
+
+    __slots__ = ("rid", "title", "keywords", "search_aliases", "_link", "_qrcode",
+                 "n_title", "n_keywords", "n_aliases")
+
+    def __init__(self, id, title="", keywords=(), search_aliases=(), share_link="", qrcode=None):
+        id = str(id)
+        self.rid = int(id) if id.isascii() and id.isdigit() and str(int(id)) == id else sys.intern(id)
+        self.title = title
+        self.keywords = _intern_all(keywords)
+        self.search_aliases = _intern_all(search_aliases)
+        # 分享链接去掉公共前缀，读取时再拼回
+        if share_link.startswith(SHARE_PREFIX):
+            self._link = share_link[len(SHARE_PREFIX):]
+        else:
+            self._link = (share_link,)
+        # 二维码路径与默认规则一致时不保存
+        self._qrcode = None if qrcode in (None, f"static/qrcode/{id}.png") else qrcode
+        # 预先规范化的匹配字段
+        n_title = normalize(title)
+        self.n_title = title if n_title == title else n_title
+        self.n_keywords = _normalize_all(self.keywords)
+        self.n_aliases = _normalize_all(self.search_aliases)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            d.get("id", ""),
+            d.get("title", "") or "",
+            d.get("keywords", []),
+            d.get("search_aliases", []),
+            d.get("share_link", "") or "",
+            d.get("qrcode"),
+        )
+
+    @property
+    def id(self):
+        return str(self.rid)
+
+    @property
+    def share_link(self):
+        if isinstance(self._link, tuple):
+            return self._link[0]
+        return SHARE_PREFIX + self._link
+
+    @property
+    def qrcode(self):
+        if self._qrcode is not None:
+            return self._qrcode
+        return f"static/qrcode/{self.rid}.png"
+
+    def get(self, key, default=None):
+        if key in ("keywords", "search_aliases"):
+            return list(getattr(self, key))
+        if key in FIELDS:
+            return getattr(self, key)
+        return default
+
+    def norm(self):
+        """data.json 的 norm 字段：只包含规范化后与原文不同的字段"""
+        norm = {}
+        if self.n_title is not self.title:
+            norm["title"] = self.n_title
+        if self.n_keywords is not self.keywords:
+            norm["keywords"] = list(self.n_keywords)
+        if self.n_aliases is not self.search_aliases:
+            norm["search_aliases"] = list(self.n_aliases)
+        return norm
+
+    def to_dict(self):
+        """data.json 中的格式"""
+        d = {key: self.get(key) for key in FIELDS}
+        norm = self.norm()
+        if norm:
+            d["norm"] = norm
+        return d
+
+    def __eq__(self, other):
+        if not isinstance(other, Resource):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __repr__(self):
+        return f"Resource(id={self.id!r}, title={self.title!r})"
+
+
+# ==================== 读取 ====================
+
+def iter_json_array(path, chunk_size=64 * 1024):
+    """逐个产出顶层 JSON 数组中的元素，内存只保留当前分块"""
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(chunk_size)
+        pos = 0
+        eof = not buf
+
+        def fill():
+            nonlocal buf, pos, eof
+            more = f.read(chunk_size)
+            if not more:
+                eof = True
+            buf = buf[pos:] + more
+            pos = 0
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != "[":
+            raise ValueError(f"{path} 不是 JSON 数组")
+        pos += 1
+
+        while True:
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError(f"{path} 意外结束")
+            if buf[pos] == "]":
+                return
+            if buf[pos] == ",":
+                pos += 1
+                skip_ws()
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # 数字等标量可能在分块边界被截断，确认后面还有分隔符
+            if end >= len(buf) and not eof:
+                fill()
+                continue
+            pos = end
+            yield item
+
+
+def iter_resources(path, chunk_size=64 * 1024):
+    """流式读取 data.json，逐个产出 Resource"""
+    for item in iter_json_array(path, chunk_size):
+        yield Resource.from_dict(item)
+
+
+def load_catalog(path):
+    """读取整个目录为 Resource 列表"""
+    return list(iter_resources(path))
+
+
+def dump_catalog(resources, path):
+    """写出 data.json（格式与原先 json.dump(indent=2) 相同）"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([r.to_dict() for r in resources], f, ensure_ascii=False, indent=2)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+资源目录增量对比
+按 id 比较新旧 data.json，区分新增 / 修改 / 删除（build_resources.py 据此只为链接变化的资源重新生成二维码），
+并维护页面索引，供 SEO 生成器只重建内容有变化的页面
+"""
+
+import hashlib
+import json
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+DIFF_FILE = os.path.join(PROJECT_ROOT, "static/catalog_diff.json")
+PAGE_INDEX_FILE = os.path.join(PROJECT_ROOT, "static/page_index.json")
+
+# 参与比较的字段（qrcode 路径由 id 决定，不单独比较）
+COMPARE_FIELDS = ("title", "keywords", "search_aliases", "share_link")
+
+
+def load_json(path, default):
+    """读取 JSON 文件，不存在或损坏时返回默认值"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 读取 {path} 失败: {e}")
+        return default
+
+
+def save_json(path, data, indent=None):
+    """写入 JSON 文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+
+
+def diff_catalog(old_rows, new_rows):
+    """按 id 对比新旧资源列表
+
+    返回 {"added": [...], "changed": [...], "removed": [...], "link_changed": [...]}，
+    link_changed 是 share_link 变化（含新增）的 id，只有它们需要重新生成二维码
+    """
+    old_by_id = {str(r.get("id")): r for r in old_rows}
+    new_by_id = {str(r.get("id")): r for r in new_rows}
+
+    added, changed, link_changed = [], [], []
+    for item_id, row in new_by_id.items():
+        old = old_by_id.get(item_id)
+        if old is None:
+            added.append(item_id)
+            link_changed.append(item_id)
+            continue
+        if any(old.get(k) != row.get(k) for k in COMPARE_FIELDS):
+            changed.append(item_id)
+        if old.get("share_link") != row.get("share_link"):
+            link_changed.append(item_id)
+
+    removed = [item_id for item_id in old_by_id if item_id not in new_by_id]
+
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "link_changed": link_changed,
+    }
+
+
+# ==================== 页面索引 ====================
+# page_index.json 结构:
+# {
+#   "catalog": 生成页面时资源目录的指纹（catalog_fingerprint），
+#   "pages": {关键词: {"file", "count", "resource_count", "resource_ids", "content_hash"}}
+# }
+# 是否重新生成页面只看页面索引本身（每个页面的 content_hash），不依赖上一次 build_resources.py 输出的 diff，
+# 也不需要 资源id → 关键词 的反向索引
+
+def _digest(rows):
+    h = hashlib.sha1()
+    for row in rows:
+        h.update(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+
+def page_hash(resources):
+    """页面中展示的资源字段的哈希，任一资源的标题、链接、二维码变化都会改变"""
+    return _digest([r.id, r.title, r.share_link, r.qrcode] for r in resources)
+
+
+def catalog_fingerprint(resources):
+    """参与关键词匹配的字段的哈希，不变时可以沿用上次的匹配结果"""
+    return _digest(
+        [r.id, r.n_title, list(r.n_keywords), list(r.n_aliases)] for r in resources
+    )
+
+def load_page_index(path=PAGE_INDEX_FILE):
+    index = load_json(path, {})
+    index.setdefault("pages", {})
+    return index
+
+
+def save_page_index(pages, fingerprint=None, path=PAGE_INDEX_FILE):
+    save_json(path, {"catalog": fingerprint, "pages": pages})
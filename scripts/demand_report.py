@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+资源需求日志（requests.jsonl）流式汇总
+- 日志每行一个 JSON，至少包含 keyword，可选 time（见 local_api.py --request-log）
+- 逐行读取，记录已处理的字节偏移，下次只读新增的行；末尾不完整的行留到下次
+- 检查点同时记录日志文件标识（设备号、inode、首行哈希），日志轮转后从头读取
+- 按规范化后的关键词累计请求次数，并用 SEO 生成器的匹配规则（alias_index.py）统计目录中已有的资源数
+- 内存占用只与不同关键词的数量有关，与日志大小无关
+
+输出 scripts/.cache/demand.json，按请求次数降序:
+  {"generated_at": ..., "total": 总请求数, "fields": [...], "rows": [[关键词, 次数, 资源数, 最后请求时间], ...]}
+资源数为 0 的就是还没有满足的需求。
+
+用法: python demand_report.py [日志路径] [--full]    # --full 丢弃检查点从头统计
+"""
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+from alias_index import AliasIndex
+from catalog import load_catalog
+from catalog_diff import load_json, save_json
+from normalize import normalize
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+LOG_FILE = os.path.join(PROJECT_ROOT, "requests.jsonl")
+# Pages 部署整个仓库根目录，需求数据放在不部署的 scripts/.cache/（与 stats.db 相同）
+STATE_FILE = os.path.join(SCRIPT_DIR, ".cache/demand_state.json")
+REPORT_FILE = os.path.join(SCRIPT_DIR, ".cache/demand.json")
+DATA_FILE = os.path.join(PROJECT_ROOT, "data.json")
+
+REPORT_FIELDS = ["keyword", "count", "matched", "last_seen"]
+
+
+def file_fingerprint(path):
+    """文件大小 + 修改时间，用来判断目录是否变化"""
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return [st.st_size, int(st.st_mtime)]
+
+
+def log_identity(path):
+    """日志文件标识 [st_dev, st_ino, 首行哈希]；换了新文件或旧文件被截断重写时都会变化"""
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        head = f.readline(4096)
+    digest = hashlib.sha1(head).hexdigest() if head.endswith(b"\n") else None
+    return [st.st_dev, st.st_ino, digest]
+
+
+def load_state(full=False):
+    """检查点: {"offset": 已处理字节数, "log": 日志文件标识, "catalog": data.json 指纹,
+    "keywords": {关键词: [次数, 资源数, 最后时间]}}"""
+    empty = {"offset": 0, "log": None, "catalog": None, "keywords": {}}
+    if full:
+        return empty
+    state = load_json(STATE_FILE, empty)
+    if not isinstance(state, dict) or not isinstance(state.get("keywords"), dict):
+        return empty
+    return state
+
+
+def iter_new_records(path, offset):
+    """从 offset 开始逐行解析，产出 (记录, 该行结束处的偏移)，空行和无法解析的行记录为 None
+
+    只处理以换行结尾的完整行，写了一半的行留给下一次
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            start, offset = offset, offset + len(line)
+            record = None
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"⚠️ 跳过无法解析的行 (偏移 {start})")
+            yield record, offset
+
+
+def aggregate(path, state):
+    """把日志中新增的行累加进 state，返回新增的请求数"""
+    offset = state.get("offset", 0)
+    identity = log_identity(path)
+    # 日志被轮转或截断，重新从头读（已累计的次数保留）
+    if offset and state.get("log") not in (None, identity):
+        print("⚠️ 日志文件已更换，从头读取")
+        offset = 0
+    elif offset > os.path.getsize(path):
+        print("⚠️ 日志比检查点短，从头读取")
+        offset = 0
+
+    keywords = state["keywords"]
+    added = 0
+    for record, offset in iter_new_records(path, offset):
+        if not isinstance(record, dict):
+            continue
+        keyword = normalize(str(record.get("keyword") or ""))
+        if not keyword:
+            continue
+        entry = keywords.get(keyword)
+        if entry is None:
+            entry = keywords[keyword] = [0, None, None]
+        entry[0] += 1
+        entry[2] = record.get("time") or entry[2]
+        added += 1
+
+    state["offset"] = offset
+    state["log"] = log_identity(path)
+    return added
+
+
+def refresh_matches(state, data_file=DATA_FILE):
+    """统计每个关键词已有的资源数；目录没变时只匹配新出现的关键词"""
+    fingerprint = file_fingerprint(data_file)
+    rematch_all = fingerprint != state.get("catalog")
+    pending = [k for k, v in state["keywords"].items() if rematch_all or v[1] is None]
+    if not pending:
+        return 0
+
+    index = AliasIndex(load_catalog(data_file) if fingerprint else [])
+    for keyword in pending:
+        state["keywords"][keyword][1] = len(index.match(keyword))
+    state["catalog"] = fingerprint
+    return len(pending)
+
+
+def build_report(state):
+    rows = sorted(
+        ([k, v[0], v[1] or 0, v[2]] for k, v in state["keywords"].items()),
+        key=lambda row: (-row[1], row[0]),
+    )
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "total": sum(row[1] for row in rows),
+        "fields": REPORT_FIELDS,
+        "rows": rows,
+    }
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    log_file = args[0] if args else LOG_FILE
+    full = "--full" in sys.argv
+
+    if not os.path.exists(log_file):
+        print(f"❌ 找不到需求日志: {log_file}")
+        return
+
+    state = load_state(full)
+    added = aggregate(log_file, state)
+    matched = refresh_matches(state)
+    save_json(STATE_FILE, state)
+
+    report = build_report(state)
+    save_json(REPORT_FILE, report)
+
+    unmet = [row for row in report["rows"] if row[2] == 0]
+    print(f"📥 新增 {added} 条需求，共 {report['total']} 条 / {len(report['rows'])} 个关键词（重新匹配 {matched} 个）")
+    print(f"🔍 尚无资源的需求 {len(unmet)} 个:")
+    for keyword, count, _, last_seen in unmet[:10]:
+        print(f"  {keyword}: {count} 次 (最近 {last_seen or '未知'})")
+    print(f"✅ 已生成: {REPORT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
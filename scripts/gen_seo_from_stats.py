@@ -4,13 +4,17 @@ SEO页面生成器 - 电脑只显示二维码版本
 确保手机用户只看到链接，电脑用户只看到二维码（不显示备用链接）
 """
 
-import json
 import os
 import re
-import requests
+import sys
 from datetime import datetime
 from urllib.parse import quote
 
+from alias_index import AliasIndex
+from catalog import load_catalog
+from stats_store import DEFAULT_DB as STATS_DB, StatsStore
+from catalog_diff import catalog_fingerprint, load_page_index, page_hash, save_page_index
+
 # ==================== 配置 ====================
 # 获取当前脚本所在目录和项目根目录
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,7 +22,8 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
 CONFIG = {
     "cloudflare": {
-        "site_url": "https://www.weiyingjun.top",
+        # 设置 QUARK_API_BASE=http://127.0.0.1:8787 可改用 local_api.py 本地模拟服务器
+        "site_url": os.environ.get("QUARK_API_BASE", "https://www.weiyingjun.top"),
         "sync_key": "my_secret_sync_key",
         "timeout": 15
     },
@@ -26,12 +31,14 @@ CONFIG = {
         "data_file": os.path.join(PROJECT_ROOT, "data.json"),  # 修复路径
         "output_dir": os.path.join(PROJECT_ROOT, "search"),    # 修复路径
         "min_count": 10,
-        "qrcode_dir": os.path.join(PROJECT_ROOT, "static/qrcode")  # 修复路径
+        "qrcode_dir": os.path.join(PROJECT_ROOT, "static/qrcode"),  # 修复路径
+        "stats_db": STATS_DB  # 统计快照，见 stats_store.py
     },
     "seo": {
         "site_name": "夸克网盘资源搜索",
         "site_url": "https://www.weiyingjun.top",
-        "max_resources": 20
+        "max_resources": 20,
+        "cluster_threshold": 0.8  # 匹配资源集合的 Jaccard 相似度≥此值的关键词合并为一个页面
     }
 }
 
@@ -39,6 +46,7 @@ CONFIG = {
 
 def get_stats_from_api():
     """从Cloudflare API获取统计信息"""
+    import requests
     
     try:
         sync_url = f"{CONFIG['cloudflare']['site_url']}/api/sync"
@@ -72,14 +80,17 @@ def get_qrcode_url(resource):
             return f"/static/qrcode/{qrcode}"
     return ""
 
-def generate_seo_page(keyword, count, resources):
-    """生成单个关键词的SEO页面"""
-    # 生成安全的文件名
+def page_filename(keyword):
+    """生成安全的文件名"""
     safe_filename = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '', keyword)
     safe_filename = re.sub(r'\s+', '_', safe_filename.strip())
     if not safe_filename:
         safe_filename = f"keyword_{hash(keyword) % 10000}"
-    safe_filename += ".html"
+    return safe_filename + ".html"
+
+def generate_seo_page(keyword, count, resources):
+    """生成单个关键词的SEO页面"""
+    safe_filename = page_filename(keyword)
     
     # 生成资源列表
     resource_items = ""
@@ -528,6 +539,39 @@ def generate_seo_page(keyword, count, resources):
         'url': f"/search/{safe_filename}"
     }
 
+def generate_redirect_page(keyword, count, canonical):
+    """相似关键词的跳转页：指向同一簇的主页面，不重复渲染资源列表"""
+    safe_filename = page_filename(keyword)
+    canonical_url = f"{CONFIG['seo']['site_url']}/search/{canonical['file']}"
+    
+    html_content = f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>{keyword}资源下载 - {CONFIG['seo']['site_name']}</title>
+    <link rel="canonical" href="{canonical_url}">
+    <meta http-equiv="refresh" content="0; url={canonical['file']}">
+    <script>location.replace("{canonical['file']}");</script>
+</head>
+<body>
+    <p>"{keyword}" 的资源已合并到 <a href="{canonical['file']}">{canonical['keyword']}</a></p>
+</body>
+</html>"""
+    
+    output_path = os.path.join(CONFIG['local']['output_dir'], safe_filename)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    
+    return {
+        'keyword': keyword,
+        'count': count,
+        'file': safe_filename,
+        'url': f"/search/{safe_filename}",
+        'canonical': canonical['keyword']
+    }
+
 # ==================== 索引和站点地图函数 ====================
 
 def generate_index_page(generated_pages):
@@ -685,6 +729,171 @@ def generate_sitemap(generated_pages):
     
     print(f"✅ 生成站点地图: {sitemap_path}")
 
+# ==================== 增量构建函数 ====================
+
+def select_hot_keywords(stats, min_count):
+    """筛选搜索次数≥min_count的关键词，按次数降序"""
+    hot_keywords = []
+    for keyword, count in stats.items():
+        if isinstance(count, (int, float)):
+            count_int = int(count)
+            if count_int >= min_count:
+                hot_keywords.append((keyword, count_int))
+    
+    hot_keywords.sort(key=lambda x: x[1], reverse=True)
+    return hot_keywords
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def cluster_keywords(matches, threshold):
+    """按匹配资源集合的 Jaccard 相似度合并关键词
+
+    matches 为 [(keyword, count, resource_ids)]，按搜索次数降序；
+    每个关键词归入第一个（按建簇顺序，即主关键词搜索次数降序）相似度≥threshold 的簇，
+    否则自成一簇（搜索次数最高的为主关键词）。只与共享至少一个资源的簇比较。返回 {关键词: 主关键词}
+    """
+    canonical_of = {}
+    cluster_sets = {}       # 主关键词 → 资源 id 集合，按建簇顺序
+    clusters_by_id = {}     # 资源 id → 包含它的主关键词
+    order = {}              # 主关键词 → 建簇序号
+    for keyword, _, resource_ids in matches:
+        ids = set(resource_ids)
+        candidates = {head for item_id in ids for head in clusters_by_id.get(item_id, ())}
+        head = next((c for c in sorted(candidates, key=order.get)
+                     if jaccard(ids, cluster_sets[c]) >= threshold), None)
+        if head is None:
+            head = keyword
+            cluster_sets[head] = ids
+            order[head] = len(order)
+            for item_id in ids:
+                clusters_by_id.setdefault(item_id, []).append(head)
+        canonical_of[keyword] = head
+    return canonical_of
+
+def build_pages(hot_keywords, resources, page_index, full_rebuild=False, changed_keywords=None,
+                fingerprint=None, index=None):
+    """只重新生成内容有变化的关键词页面，匹配结果几乎相同的关键词合并为一个页面
+
+    页面索引中每个页面记录渲染时资源字段的哈希（content_hash），与当前资源的哈希不同才重新生成；
+    changed_keywords 为统计快照中计数有变化的关键词（见 stats_store.py），页面索引记录的目录指纹
+    与当前一致时，其余关键词直接沿用上次的匹配结果，不再重新匹配
+    index 为已建好的 AliasIndex（watch_build.py 常驻内存），不传则按需构建
+    返回 (generated_pages, new_pages)，generated_pages 只含主页面，new_pages 是新的页面索引
+    """
+    output_dir = CONFIG['local']['output_dir']
+    old_pages = page_index["pages"]
+    fingerprint = fingerprint or catalog_fingerprint(resources)
+    catalog_changed = full_rebuild or page_index.get("catalog") != fingerprint
+    by_id = {r.id: r for r in resources}
+
+    def find_resources(keyword):
+        nonlocal index
+        if index is None:
+            index = AliasIndex(resources)
+        return index.match(keyword)
+
+    # 查找匹配资源
+    matches = []
+    matched_by_keyword = {}
+    for keyword, count in hot_keywords:
+        old = old_pages.get(keyword)
+        if (changed_keywords is not None and not catalog_changed and old is not None
+                and keyword not in changed_keywords and 'resource_ids' in old):
+            # 统计和资源都没变，沿用上次的匹配结果
+            matched_resources = [by_id[i] for i in old['resource_ids'] if i in by_id]
+        else:
+            matched_resources = find_resources(keyword)
+        if not matched_resources:
+            print(f"  ⚠️  '{keyword}' 未找到相关资源，跳过")
+            continue
+        matched_by_keyword[keyword] = matched_resources
+        matches.append((keyword, count, [r.id for r in matched_resources]))
+
+    canonical_of = cluster_keywords(matches, CONFIG['seo']['cluster_threshold'])
+
+    def is_fresh(old):
+        return (
+            not full_rebuild
+            and old is not None
+            and os.path.exists(os.path.join(output_dir, old.get('file', '')))
+        )
+
+    generated_pages = []
+    new_pages = {}
+    rendered = 0
+    
+    # 主页面
+    for keyword, count, resource_ids in matches:
+        if canonical_of[keyword] != keyword:
+            continue
+        old = old_pages.get(keyword)
+        matched_resources = matched_by_keyword[keyword]
+        content_hash = page_hash(matched_resources[:CONFIG['seo']['max_resources']])
+        up_to_date = (
+            is_fresh(old)
+            and 'canonical' not in old
+            and old.get('count') == count
+            and old.get('resource_ids') == resource_ids
+            and old.get('content_hash') == content_hash
+        )
+        
+        if up_to_date:
+            page_info = {k: v for k, v in old.items() if k not in ('resource_ids', 'content_hash')}
+        else:
+            print(f"  处理: '{keyword}' ({count}次搜索)，{len(matched_resources)} 个相关资源")
+            # 生成HTML页面
+            page_info = generate_seo_page(keyword, count, matched_resources)
+            rendered += 1
+        
+        if page_info:
+            generated_pages.append(page_info)
+            new_pages[keyword] = {**page_info, 'resource_ids': resource_ids, 'content_hash': content_hash}
+    
+    # 相似关键词：跳转到主页面
+    merged = 0
+    for keyword, count, resource_ids in matches:
+        head = canonical_of[keyword]
+        if head == keyword or head not in new_pages:
+            continue
+        merged += 1
+        old = old_pages.get(keyword)
+        if is_fresh(old) and old.get('canonical') == head and old.get('count') == count:
+            new_pages[keyword] = {**old, 'resource_ids': resource_ids}
+            continue
+        print(f"  合并: '{keyword}' → '{head}'")
+        page_info = generate_redirect_page(keyword, count, new_pages[head])
+        new_pages[keyword] = {**page_info, 'resource_ids': resource_ids}
+        rendered += 1
+    
+    print(f"✅ 重新生成 {rendered} 个页面，{len(new_pages) - rendered} 个页面无变化")
+    if merged:
+        print(f"🔗 {merged} 个相似关键词合并到主页面，少生成 {merged} 个完整页面")
+    return generated_pages, new_pages
+
+def remove_stale_pages(old_pages, new_pages, dropped_keywords=()):
+    """删除上次生成、这次不再生成的页面（跌出热门或不再匹配到资源），返回删除的文件名
+
+    按新旧页面索引的差集判断，不依赖统计快照，没有上一次快照时也能清理；
+    dropped_keywords 只用来在日志里区分原因
+    """
+    output_dir = CONFIG['local']['output_dir']
+    keep = {page['file'] for page in new_pages.values()}
+    removed = []
+    for keyword in set(old_pages) - set(new_pages):
+        filename = old_pages[keyword].get('file')
+        if not filename or filename in keep:
+            continue
+        path = os.path.join(output_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)
+            removed.append(filename)
+            reason = "跌出热门" if keyword in dropped_keywords else "不再生成"
+            print(f"  🗑️ '{keyword}' {reason}，删除 {filename}")
+    return removed
+
 # ==================== 主函数 ====================
 
 def main():
@@ -708,24 +917,29 @@ def main():
     print("\n1️⃣ 获取搜索统计...")
     stats = get_stats_from_api()
     
+    min_count = CONFIG['local']['min_count']
+    changed_keywords = None
+    dropped_keywords = []
+    
     if not stats:
         print("⚠️ 使用示例数据继续")
         stats = {"剧本杀": 23, "启蒙英语": 15}
+    else:
+        # 保存快照，找出计数变化和跨过阈值的关键词
+        store = StatsStore(CONFIG['local']['stats_db'])
+        store.append_snapshot(stats)
+        changed_keywords = set(store.deltas())
+        risen_keywords, dropped_keywords = store.crossings(min_count)
+        store.close()
+        print(f"📈 与上次相比: {len(changed_keywords)} 个关键词计数变化，"
+              f"新进热门 {len(risen_keywords)} 个，跌出热门 {len(dropped_keywords)} 个")
     
     print(f"\n📊 找到 {len(stats)} 个关键词统计")
     
     # 2. 筛选热门关键词
-    min_count = CONFIG['local']['min_count']
     print(f"\n2️⃣ 筛选热门关键词 (≥{min_count}次)...")
     
-    hot_keywords = []
-    for keyword, count in stats.items():
-        if isinstance(count, (int, float)):
-            count_int = int(count)
-            if count_int >= min_count:
-                hot_keywords.append((keyword, count_int))
-    
-    hot_keywords.sort(key=lambda x: x[1], reverse=True)
+    hot_keywords = select_hot_keywords(stats, min_count)
     
     if not hot_keywords:
         print(f"❌ 没有搜索次数≥{min_count}的关键词")
@@ -743,8 +957,7 @@ def main():
     print(f"文件是否存在: {os.path.exists(data_file)}")
     
     try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            resources = json.load(f)
+        resources = load_catalog(data_file)
         print(f"✅ 加载 {len(resources)} 个资源")
         
     except Exception as e:
@@ -761,50 +974,20 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     print(f"输出目录已创建: {os.path.exists(output_dir)}")
     
-    generated_pages = []
+    # 增量模式：读取上次的页面索引，按页面内容哈希判断是否需要重新生成
+    full_rebuild = "--full" in sys.argv
+    page_index = load_page_index()
+    fingerprint = catalog_fingerprint(resources)
+    if full_rebuild:
+        print("全量重建所有页面")
     
-    for keyword, count in hot_keywords:
-        print(f"  处理: '{keyword}' ({count}次搜索)")
-        
-        # 查找匹配资源
-        matched_resources = []
-        keyword_lower = keyword.lower()
-        
-        for resource in resources:
-            # 如果有 search_aliases，用别名匹配（双向匹配）
-            search_aliases = resource.get('search_aliases', [])
-            if isinstance(search_aliases, list) and search_aliases:
-                if any(keyword_lower in str(alias).lower() or str(alias).lower() in keyword_lower for alias in search_aliases):
-                    matched_resources.append(resource)
-                    continue
-            
-            # 没有别名时，用 title 匹配
-            title = resource.get('title', '').lower()
-            if keyword_lower in title:
-                matched_resources.append(resource)
-                continue
-            
-            # 检查keywords
-            keywords = resource.get('keywords', [])
-            if isinstance(keywords, list):
-                if any(keyword_lower in str(k).lower() for k in keywords):
-                    matched_resources.append(resource)
-                    continue
-            elif isinstance(keywords, str):
-                if keyword_lower in keywords.lower():
-                    matched_resources.append(resource)
-                    continue
-        
-        if not matched_resources:
-            print(f"    ⚠️  未找到相关资源，跳过")
-            continue
-        
-        print(f"    ✅ 找到 {len(matched_resources)} 个相关资源")
-        
-        # 生成HTML页面
-        page_info = generate_seo_page(keyword, count, matched_resources)
-        if page_info:
-            generated_pages.append(page_info)
+    generated_pages, new_pages = build_pages(
+        hot_keywords, resources, page_index, full_rebuild, changed_keywords, fingerprint
+    )
+    save_page_index(new_pages, fingerprint)
+    
+    # 上次生成、这次不再生成的页面
+    remove_stale_pages(page_index["pages"], new_pages, dropped_keywords)
     
     # 5. 生成索引和站点地图
     if generated_pages:
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Cloudflare KV 的本地替身（供 local_api.py 和限流参考实现使用）
+- MemoryKV: 进程内字典
+- SQLiteKV: 持久化到 SQLite 文件，重启后数据仍在
+- FlakyKV: 包装任意 KV，注入延迟和随机失败，用来模拟线上 KV 的抖动
+- CountingKV: 包装任意 KV，统计读写次数
+
+接口与 Workers KV 对齐: get(key) / put(key, value, expiration_ttl=None) / delete(key)，值均为字符串
+"""
+
+import random
+import sqlite3
+import threading
+import time
+
+
+class KVError(Exception):
+    """模拟的 KV 读写失败"""
+
+
+class MemoryKV:
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._data = {}  # key → (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= self.clock():
+                del self._data[key]
+                return None
+            return value
+
+    def put(self, key, value, expiration_ttl=None):
+        expires_at = self.clock() + expiration_ttl if expiration_ttl else None
+        with self._lock:
+            self._data[key] = (str(value), expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteKV:
+    def __init__(self, path, clock=time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= self.clock():
+                self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return value
+
+    def put(self, key, value, expiration_ttl=None):
+        expires_at = self.clock() + expiration_ttl if expiration_ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, str(value), expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class FlakyKV:
+    """给每次读写加上 latency 秒（± jitter）延迟，并以 failure_rate 概率抛出 KVError"""
+
+    def __init__(self, kv, latency=0.0, jitter=0.0, failure_rate=0.0, seed=None):
+        self.kv = kv
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _before(self, op):
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise KVError(f"injected KV {op} failure")
+
+    def get(self, key):
+        self._before("get")
+        return self.kv.get(key)
+
+    def put(self, key, value, expiration_ttl=None):
+        self._before("put")
+        self.kv.put(key, value, expiration_ttl)
+
+    def delete(self, key):
+        self._before("delete")
+        self.kv.delete(key)
+
+
+class CountingKV:
+    """统计读写次数，用来比较不同实现的 KV 开销"""
+
+    def __init__(self, kv):
+        self.kv = kv
+        self.gets = self.puts = self.deletes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            self.gets += 1
+        return self.kv.get(key)
+
+    def put(self, key, value, expiration_ttl=None):
+        with self._lock:
+            self.puts += 1
+        self.kv.put(key, value, expiration_ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self.deletes += 1
+        self.kv.delete(key)
+
+
+def open_kv(spec, latency=0.0, jitter=0.0, failure_rate=0.0, seed=None):
+    """根据字符串创建 KV：'memory' 或 'sqlite:路径'"""
+    if spec == "memory":
+        kv = MemoryKV()
+    elif spec.startswith("sqlite:"):
+        kv = SQLiteKV(spec[len("sqlite:"):])
+    else:
+        raise ValueError(f"未知的 KV 类型: {spec}")
+    if latency or jitter or failure_rate:
+        kv = FlakyKV(kv, latency, jitter, failure_rate, seed)
+    return kv
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+搜索 API 压测工具（asyncio，仅用标准库）
+按 static/status.json 中的搜索次数加权抽取关键词，以指定并发和速率请求 /api/record、/api/hot 等接口，
+输出各接口吞吐量、p50/p95/p99 延迟、错误率，以及 /api/record 丢失的计数
+（发送成功的次数 与 服务端 /api/debug 统计增量之差）。
+
+用法:
+  python load_test.py --base http://127.0.0.1:8787 --concurrency 50 --rate 200 --duration 30
+  python load_test.py --base https://www.weiyingjun.top --smoke      # 每个接口请求一次，检查是否可用
+
+注意：压测线上会写入真实统计，建议配合 --keyword-prefix 或使用 local_api.py
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import ssl
+import time
+from collections import Counter, defaultdict
+from urllib.parse import quote, urlsplit
+
+from normalize import normalize
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+SYNC_KEY = "my_secret_sync_key"
+DEFAULT_MIX = "record=80,hot=15,sync=3,gap=2"
+# 会改变服务端状态的接口（record 的 GET 也会计数），连接出错时不能重试
+NON_IDEMPOTENT = {"record", "record_post", "request"}
+
+
+# ==================== 最小 HTTP/1.1 客户端 ====================
+
+class HTTPConnection:
+    """单个 keep-alive 连接，支持 Content-Length 和 chunked 响应"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.tls = parts.scheme == "https"
+        self.port = parts.port or (443 if self.tls else 80)
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def _connect(self):
+        ctx = ssl.create_default_context() if self.tls else None
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, ssl=ctx, server_hostname=self.host if self.tls else None
+        )
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, headers=None, retry=True):
+        """返回 (status, body_bytes)
+
+        retry 为 False 时连接出错不重试：请求可能已经被服务端处理，重试会重复计数
+        """
+        for attempt in (0, 1):
+            if self.writer is None:
+                await self._connect()
+            try:
+                return await asyncio.wait_for(self._roundtrip(method, path, body, headers), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # 服务端关闭了空闲连接，重连后重试一次
+                self.close()
+                if attempt or not retry:
+                    raise
+            except BaseException:
+                self.close()
+                raise
+
+    async def _roundtrip(self, method, path, body, headers):
+        payload = body or b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", "Connection: keep-alive",
+                 f"Content-Length: {len(payload)}", "User-Agent: quark-load-test"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        resp_headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            resp_headers[name.strip().lower()] = value.strip()
+
+        if resp_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            data = b"".join(chunks)
+        elif "content-length" in resp_headers:
+            data = await self.reader.readexactly(int(resp_headers["content-length"]))
+        else:
+            data = await self.reader.read()
+            self.close()
+            return status, data
+
+        if resp_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, data
+
+
+# ==================== 请求构造 ====================
+
+def load_keyword_weights(path, prefix=""):
+    """读取 status.json（/api/sync 输出），返回 (关键词列表, 权重列表)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            stats = json.load(f).get("stats", {})
+    except (OSError, ValueError):
+        stats = {}
+    if not stats:
+        stats = {"剧本杀": 23, "启蒙英语": 15}
+    words = [prefix + w for w in stats]
+    return words, [max(int(c), 1) for c in stats.values()]
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def build_request(endpoint, keyword):
+    """返回 (method, path, body, headers)"""
+    if endpoint == "record":
+        return "GET", f"/api/record?q={quote(keyword)}", None, None
+    if endpoint == "record_post":
+        body = json.dumps({"keyword": keyword}, ensure_ascii=False).encode("utf-8")
+        return "POST", "/api/record", body, {"Content-Type": "application/json"}
+    if endpoint == "sync":
+        return "GET", f"/api/sync?key={SYNC_KEY}", None, None
+    if endpoint == "request":
+        body = json.dumps({"keyword": keyword}, ensure_ascii=False).encode("utf-8")
+        return "POST", "/api/request", body, {"Content-Type": "application/json"}
+    return "GET", f"/api/{endpoint}", None, None
+
+
+# ==================== 统计 ====================
+
+def percentile(sorted_values, p):
+    """最近秩法百分位"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+async def fetch_server_counts(base, timeout):
+    """通过 /api/debug 读取服务端全部关键词计数"""
+    conn = HTTPConnection(base, timeout)
+    try:
+        status, body = await conn.request("GET", "/api/debug")
+        if status != 200:
+            return None
+        return {item["word"]: item["count"] for item in json.loads(body).get("allStats", [])}
+    except (OSError, ValueError, asyncio.TimeoutError):
+        return None
+    finally:
+        conn.close()
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.statuses = defaultdict(Counter)
+        self.sent_increments = Counter()
+
+    def report(self, elapsed):
+        print(f"\n{'接口':<12}{'请求':>8}{'错误':>8}{'错误率':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        total = 0
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            n = len(values)
+            total += n
+            err = self.errors[endpoint]
+            print(f"{endpoint:<12}{n:>8}{err:>8}{err / n:>9.2%}{n / elapsed:>9.1f}"
+                  f"{percentile(values, 50) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}"
+                  f"{percentile(values, 99) * 1000:>9.1f}")
+        print(f"\n总计 {total} 个请求，用时 {elapsed:.1f}s，吞吐量 {total / elapsed:.1f} req/s")
+        for endpoint, statuses in sorted(self.statuses.items()):
+            print(f"  {endpoint}: " + ", ".join(f"{s}×{c}" for s, c in sorted(statuses.items(), key=str)))
+
+
+# ==================== 压测 ====================
+
+async def run_load(args):
+    words, weights = load_keyword_weights(args.stats, args.keyword_prefix)
+    mix = parse_mix(args.mix)
+    endpoints, endpoint_weights = list(mix), list(mix.values())
+    rng = random.Random(args.seed)
+    results = Results()
+
+    baseline = await fetch_server_counts(args.base, args.timeout) if "record" in mix or "record_post" in mix else None
+
+    deadline = time.monotonic() + args.duration if args.duration else None
+    remaining = [args.requests] if args.requests else None
+    interval = 1.0 / args.rate if args.rate else 0.0
+    next_slot = [time.monotonic()]
+    slot_lock = asyncio.Lock()
+
+    async def take_slot():
+        """全局速率控制：按固定间隔发放请求名额"""
+        async with slot_lock:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return False
+            wait = next_slot[0] - now
+            next_slot[0] = max(next_slot[0], now) + interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    async def worker():
+        conn = HTTPConnection(args.base, args.timeout)
+        try:
+            while await take_slot():
+                endpoint = rng.choices(endpoints, endpoint_weights)[0]
+                keyword = rng.choices(words, weights)[0]
+                method, path, body, headers = build_request(endpoint, keyword)
+                started = time.perf_counter()
+                try:
+                    status, _ = await conn.request(method, path, body, headers,
+                                                   retry=endpoint not in NON_IDEMPOTENT)
+                except (OSError, asyncio.TimeoutError, ValueError, asyncio.IncompleteReadError) as e:
+                    status = type(e).__name__
+                results.latencies[endpoint].append(time.perf_counter() - started)
+                results.statuses[endpoint][status] += 1
+                if status != 200:
+                    results.errors[endpoint] += 1
+                elif endpoint in ("record", "record_post"):
+                    # 服务端按 normalize 规则计数
+                    results.sent_increments[normalize(keyword)] += 1
+        finally:
+            conn.close()
+
+    print(f"🚀 压测 {args.base}  并发 {args.concurrency}  速率 {args.rate or '不限'} req/s  "
+          f"{'时长 %ss' % args.duration if args.duration else '请求数 %s' % args.requests}")
+    started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = max(time.monotonic() - started, 1e-9)
+    results.report(elapsed)
+
+    # 丢失计数：发送成功的 record 次数 与 服务端计数增量之差
+    if results.sent_increments:
+        final = await fetch_server_counts(args.base, args.timeout)
+        if baseline is None or final is None:
+            print("\n⚠️ 无法读取 /api/debug，跳过丢失计数检查")
+            return
+        sent = sum(results.sent_increments.values())
+        applied = sum(final.get(k, 0) - baseline.get(k, 0) for k in results.sent_increments)
+        lost = sent - applied
+        print(f"\n📉 record 成功 {sent} 次，服务端增加 {applied} 次，丢失 {lost} 次 ({lost / sent:.2%})")
+        worst = sorted(results.sent_increments, key=lambda k: results.sent_increments[k] - (final.get(k, 0) - baseline.get(k, 0)), reverse=True)[:5]
+        for k in worst:
+            print(f"  {k}: 发送 {results.sent_increments[k]}，增加 {final.get(k, 0) - baseline.get(k, 0)}")
+
+
+async def run_smoke(args):
+    """每个接口请求一次并打印部分响应（原 test_api.py 的功能）"""
+    conn = HTTPConnection(args.base, args.timeout)
+    try:
+        for endpoint in ("health", "ping", "hot", "debug", "sync", "record", "record_post"):
+            method, path, body, headers = build_request(endpoint, "测试关键词")
+            print(f"\n🔍 {method} {path}")
+            try:
+                status, data = await conn.request(method, path, body, headers,
+                                                  retry=endpoint not in NON_IDEMPOTENT)
+            except (OSError, asyncio.TimeoutError, ValueError, asyncio.IncompleteReadError) as e:
+                print(f"  ❌ 请求失败: {e!r}")
+                continue
+            print(f"  状态码: {status}")
+            print(f"  响应: {data.decode('utf-8', 'replace')[:100]}...")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索 API 压测工具")
+    parser.add_argument("--base", default="http://127.0.0.1:8787", help="API 根地址")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=0, help="总请求速率 req/s，0 表示不限")
+    parser.add_argument("--duration", type=float, default=10, help="压测时长（秒）")
+    parser.add_argument("--requests", type=int, default=0, help="总请求数，设置后忽略 --duration")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"接口权重，默认 {DEFAULT_MIX}（可用 record_post、request、ping 等）")
+    parser.add_argument("--stats", default=os.path.join(PROJECT_ROOT, "static/status.json"), help="关键词权重来源")
+    parser.add_argument("--keyword-prefix", default="", help="给关键词加前缀，避免污染真实统计")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--smoke", action="store_true", help="只对每个接口请求一次")
+    args = parser.parse_args()
+    if args.requests:
+        args.duration = 0
+    elif args.duration <= 0 and not args.smoke:
+        parser.error("--duration 必须大于 0，或用 --requests 指定总请求数")
+
+    asyncio.run(run_smoke(args) if args.smoke else run_load(args))
+
+
+if __name__ == "__main__":
+    main()
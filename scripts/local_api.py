@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+搜索 API 本地模拟服务器
+按 functions/api/[[path]].js 的逻辑实现 /api/record、/api/hot、/api/sync、/api/gap、/api/request 等接口，
+返回结构与线上一致，KV 使用 kv_store.py 中的内存 / SQLite 替身，可注入延迟和失败。
+用于离线调试、给 gen_seo_from_stats.py 提供统计数据、以及压测，不会污染线上统计。
+
+用法:
+  cd scripts && python local_api.py --port 8787 --kv sqlite:/tmp/stats.db --latency 0.02 --failure-rate 0.01
+  QUARK_API_BASE=http://127.0.0.1:8787 python gen_seo_from_stats.py
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from alias_index import AliasIndex
+from catalog import load_catalog
+from kv_store import KVError, open_kv
+from normalize import normalize
+from ratelimit import ip_limiter, keyword_limiter
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+SYNC_KEY = "my_secret_sync_key"
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS, PATCH",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With, Accept, Origin",
+    "Access-Control-Allow-Credentials": "true",
+    "Access-Control-Max-Age": "86400",
+    "Vary": "Origin, Accept-Encoding",
+}
+
+def now_iso():
+    """与 JS new Date().toISOString() 格式一致"""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def get_hot_level(count):
+    if count >= 100:
+        return "🔥🔥🔥"
+    if count >= 50:
+        return "🔥🔥"
+    if count >= 20:
+        return "🔥"
+    if count >= 10:
+        return "👍"
+    return "📊"
+
+
+def gap_matches(query, resource):
+    """与 handleGap 的匹配规则一致（query 已规范化），逐条扫描的参考实现，/api/gap 使用 AliasIndex"""
+    if resource.n_aliases:
+        return any(query in alias or alias in query for alias in resource.n_aliases)
+    if query in resource.n_title:
+        return True
+    return any(query in k or k in query for k in resource.n_keywords)
+
+
+class Response:
+    def __init__(self, body, status=200, headers=None):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body, ensure_ascii=False, separators=(",", ":"))
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.status = status
+        self.headers = {"Content-Type": "application/json", **CORS_HEADERS, **(headers or {})}
+
+
+class Request:
+    def __init__(self, method, url, headers=None, body=b"", client_ip="127.0.0.1"):
+        self.method = method
+        parts = urlsplit(url)
+        self.path = parts.path
+        self.query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.body = body or b""
+        self.client_ip = client_ip
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+class LocalAPI:
+    """与 onRequest 对应的路由和处理函数，不依赖 HTTP 服务器，可直接在进程内调用"""
+
+    def __init__(self, kv, data_file=None, notify=None, request_log=None):
+        self.kv = kv
+        self.data_file = data_file or os.path.join(PROJECT_ROOT, "data.json")
+        self.notify = notify or (lambda content: print(f"📨 [webhook]\n{content}"))
+        self.request_log = request_log  # 需求日志（JSON Lines），供 demand_report.py 汇总
+        self.quiet = False
+        # 与 Functions 的 isolate 一样，限流缓存常驻进程内
+        self.ip_limiter = ip_limiter()
+        self.keyword_limiter = keyword_limiter()
+        # /api/gap 的匹配索引，data.json 未变化时复用
+        self._gap_index = None
+        self._gap_index_key = None
+        self._gap_index_lock = threading.Lock()
+
+    def handle(self, request):
+        segments = [s for s in request.path.split("/") if s]
+        if not segments or segments[0] != "api":
+            return Response("Not Found", 404, {"Content-Type": "text/plain"})
+
+        if request.method == "OPTIONS":
+            return Response(b"", 200, {"Content-Type": "text/plain"})
+
+        action = segments[1] if len(segments) > 1 else ""
+        handler = {
+            "record": self.handle_record,
+            "hot": self.handle_hot,
+            "sync": self.handle_sync,
+            "gap": self.handle_gap,
+            "debug": self.handle_debug,
+            "health": self.handle_health,
+            "ping": self.handle_ping,
+            "request": self.handle_request,
+        }.get(action)
+        if handler is None:
+            return Response({
+                "error": "Endpoint not found",
+                "available": ["/api/record", "/api/hot", "/api/sync", "/api/debug", "/api/health", "/api/ping", "/api/request"]
+            }, 404)
+        try:
+            return handler(request)
+        except Exception as e:
+            # 线上未捕获的异常由 Cloudflare 返回 500
+            return Response({"error": "Worker threw exception", "message": str(e)}, 500)
+
+    # ---------- KV ----------
+
+    def read_stats(self):
+        try:
+            data = self.kv.get("stats")
+            return json.loads(data) if data else {}
+        except (KVError, ValueError):
+            return {}
+
+    # ---------- /api/record ----------
+
+    def handle_record(self, request):
+        keyword = ""
+        if request.method == "GET":
+            keyword = request.query.get("q") or request.query.get("keyword")
+        elif request.method == "POST":
+            content_type = request.headers.get("content-type", "")
+            try:
+                if "application/json" in content_type:
+                    body = request.json()
+                    keyword = body.get("keyword") or body.get("q") or body.get("query") or body.get("search")
+                elif "application/x-www-form-urlencoded" in content_type:
+                    form = {k: v[0] for k, v in parse_qs(request.body.decode("utf-8")).items()}
+                    keyword = form.get("keyword") or form.get("q")
+                elif "text/plain" in content_type:
+                    keyword = request.body.decode("utf-8")
+                else:
+                    try:
+                        keyword = request.json().get("keyword")
+                    except ValueError:
+                        keyword = request.query.get("q", "")
+            except (ValueError, AttributeError):
+                return Response({
+                    "success": False,
+                    "error": "Parse error",
+                    "message": "无法解析请求数据",
+                    "hint": "请使用: GET /api/record?q=关键词 或 POST with {'keyword':'关键词'}"
+                }, 400)
+        else:
+            return Response({
+                "success": False,
+                "error": "Method not allowed",
+                "allowed": ["GET", "POST"],
+                "usage": {"GET": "/api/record?q=关键词", "POST": '{"keyword":"关键词"}'}
+            }, 405)
+
+        if not keyword or not str(keyword).strip():
+            return Response({
+                "success": False,
+                "error": "Missing keyword",
+                "received": {"keyword": keyword, "method": request.method},
+            }, 400)
+
+        normalized_keyword = normalize(keyword)
+        if len(normalized_keyword) > 100:
+            return Response({
+                "success": False,
+                "error": "Keyword too long",
+                "maxLength": 100,
+                "receivedLength": len(normalized_keyword)
+            }, 400)
+
+        # 与线上一致：整张表读出 +1 再写回，并发时会丢失计数
+        stats = self.read_stats()
+        current_count = stats.get(normalized_keyword, 0) + 1
+        stats[normalized_keyword] = current_count
+        try:
+            self.kv.put("stats", json.dumps(stats, ensure_ascii=False, separators=(",", ":")))
+        except KVError as e:
+            print(f"保存 KV 失败: {e}")
+
+        return Response({
+            "success": True,
+            "keyword": normalized_keyword,
+            "count": current_count,
+            "method": request.method,
+            "timestamp": now_iso(),
+            "isHot": current_count >= 10,
+            "hotLevel": get_hot_level(current_count)
+        }, headers={
+            "Cache-Control": "no-store, no-cache, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0"
+        })
+
+    # ---------- /api/hot ----------
+
+    def handle_hot(self, request):
+        stats = self.read_stats()
+        hot = sorted(((w, c) for w, c in stats.items() if c >= 10), key=lambda x: x[1], reverse=True)[:20]
+        return Response([
+            {"word": w, "count": c, "isHot": c >= 50, "level": get_hot_level(c)} for w, c in hot
+        ])
+
+    # ---------- /api/sync ----------
+
+    def handle_sync(self, request):
+        if request.query.get("key") != SYNC_KEY:
+            return Response("Unauthorized", 401, {"Content-Type": "text/plain"})
+        stats = self.read_stats()
+        entries = sorted(((w, c) for w, c in stats.items() if c >= 10), key=lambda x: x[1], reverse=True)[:50]
+        return Response({
+            "success": True,
+            "count": len(entries),
+            "stats": dict(entries),
+            "timestamp": now_iso()
+        })
+
+    # ---------- /api/gap ----------
+
+    def gap_index(self):
+        """data.json 的 AliasIndex，按文件大小和修改时间缓存，文件变化后才重新加载"""
+        try:
+            st = os.stat(self.data_file)
+            key = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            key = None
+        with self._gap_index_lock:
+            if self._gap_index is None or key != self._gap_index_key:
+                try:
+                    resources = load_catalog(self.data_file)
+                except (OSError, ValueError) as e:
+                    print(f"❌ data.json 加载失败 {e}")
+                    resources = []
+                self._gap_index = AliasIndex(resources)
+                self._gap_index_key = key
+            return self._gap_index
+
+    def handle_gap(self, request):
+        stats = self.read_stats()
+        index = self.gap_index()
+
+        gaps = []
+        for word, count in stats.items():
+            if count < 5:
+                continue
+            keyword = word.strip()
+            query = normalize(keyword)
+            if not index.gap_match(query):
+                gaps.append({
+                    "word": keyword,
+                    "count": count,
+                    "level": get_hot_level(count),
+                    "reason": "热度高但 data.json 暂无匹配资源",
+                    "first_seen": now_iso()[:10]
+                })
+        gaps.sort(key=lambda g: g["count"], reverse=True)
+        return Response(json.dumps(gaps, ensure_ascii=False, indent=2), headers={
+            "Content-Type": "application/json; charset=utf-8",
+            "Cache-Control": "no-store"
+        })
+
+    # ---------- /api/debug /api/health /api/ping ----------
+
+    def handle_debug(self, request):
+        stats = self.read_stats()
+        all_stats = [
+            {"word": w, "count": c, "meetsThreshold": c >= 10}
+            for w, c in sorted(stats.items(), key=lambda x: x[1], reverse=True)
+        ]
+        total = sum(stats.values())
+        summary = {
+            "totalKeywords": len(stats),
+            "totalSearches": total,
+            "threshold": 10,
+            "keywordsAboveThreshold": sum(1 for s in all_stats if s["meetsThreshold"]),
+            "averageSearchesPerKeyword": f"{total / len(stats):.2f}" if stats else "0.00",
+            "topKeywords": all_stats[:10]
+        }
+        return Response(json.dumps({
+            "debug": True,
+            "summary": summary,
+            "allStats": all_stats,
+            "timestamp": now_iso()
+        }, ensure_ascii=False, indent=2))
+
+    def handle_health(self, request):
+        return Response({
+            "status": "healthy",
+            "service": "quark-search-api",
+            "timestamp": now_iso(),
+            "endpoints": ["/api/record", "/api/hot", "/api/sync", "/api/debug", "/api/health"]
+        })
+
+    def handle_ping(self, request):
+        return Response({"pong": now_ms(), "timestamp": now_iso()})
+
+    # ---------- /api/request ----------
+
+    def handle_request(self, request):
+        json_headers = {"Content-Type": "application/json; charset=utf-8"}
+        if request.method != "POST":
+            return Response({"success": False, "error": "Method not allowed"}, 405, json_headers)
+        try:
+            keyword = (request.json().get("keyword") or "").strip()
+        except (ValueError, AttributeError):
+            return Response({"success": False, "error": "Invalid JSON"}, 400, json_headers)
+        if not keyword:
+            return Response({"success": False, "error": "关键词不能为空"}, 400, json_headers)
+
+        client_ip = request.headers.get("cf-connecting-ip") or request.headers.get("x-forwarded-for") or request.client_ip
+        allowed, retry_after = self.ip_limiter.take(self.kv, client_ip)
+        if not allowed:
+            return Response({
+                "success": False,
+                "error": f"请求过于频繁，请{math.ceil(retry_after / 60)}分钟后再试"
+            }, 429, json_headers)
+
+        if not self.keyword_limiter.take(self.kv, keyword.lower())[0]:
+            return Response({"success": False, "error": "该关键词今天已提交过，请明天再试"}, 429, json_headers)
+
+        beijing = datetime.now(timezone.utc).timestamp() + 8 * 3600
+        time_str = datetime.fromtimestamp(beijing, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        content = f"新资源需求通知\n\n关键词：{keyword}\n时间：{time_str}\n来源：网站资源登记接口"
+        try:
+            self.notify(content)
+        except Exception as e:
+            return Response({"success": False, "error": "发送企业微信失败", "detail": str(e)}, 500, json_headers)
+        if self.request_log:
+            with open(self.request_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"keyword": keyword, "time": time_str}, ensure_ascii=False) + "\n")
+        return Response({"success": True, "message": "已成功提交，我们会尽快更新资源"}, headers=json_headers)
+
+
+# ==================== HTTP 服务器 ====================
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            request = Request(self.command, self.path, dict(self.headers), body, self.client_address[0])
+            response = api.handle(request)
+            self.send_response(response.status)
+            for name, value in response.headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(response.body)))
+            self.end_headers()
+            self.wfile.write(response.body)
+
+        do_GET = do_POST = do_OPTIONS = do_PUT = do_DELETE = do_PATCH = _dispatch
+
+        def log_message(self, format, *args):
+            if not api.quiet:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def webhook_sender(url):
+    def send(content):
+        payload = json.dumps({"msgtype": "text", "text": {"content": content}}).encode("utf-8")
+        req = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json; charset=utf-8"})
+        urllib.request.urlopen(req, timeout=10).close()
+    return send
+
+
+def serve(api, host="127.0.0.1", port=8787, quiet=False):
+    api.quiet = quiet
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索 API 本地模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--kv", default="memory", help="memory 或 sqlite:路径")
+    parser.add_argument("--latency", type=float, default=0.0, help="每次 KV 操作的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的随机浮动（秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="KV 操作失败概率 0~1")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--seed-stats", help="用 status.json（/api/sync 输出）初始化统计")
+    parser.add_argument("--webhook", help="真实的企业微信 webhook；不填则只打印到控制台")
+    parser.add_argument("--request-log", help="把 /api/request 提交的需求追加到 JSON Lines 文件")
+    parser.add_argument("--quiet", action="store_true", help="不打印访问日志")
+    args = parser.parse_args()
+
+    kv = open_kv(args.kv, args.latency, args.jitter, args.failure_rate, args.seed)
+    if args.seed_stats:
+        with open(args.seed_stats, "r", encoding="utf-8") as f:
+            kv.put("stats", json.dumps(json.load(f).get("stats", {}), ensure_ascii=False))
+
+    api = LocalAPI(
+        kv,
+        notify=webhook_sender(args.webhook) if args.webhook else None,
+        request_log=args.request_log,
+    )
+    server = serve(api, args.host, args.port, args.quiet)
+    print(f"🚀 本地 API: http://{args.host}:{args.port}/api/health  (KV: {args.kv})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 已停止")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
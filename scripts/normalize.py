@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+搜索文本规范化规则（浏览器 index.html、Functions [[path]].js、Python 脚本三处共用）
+
+normalize(s):
+  1. Unicode NFKC：全角字母数字、全角空格、兼容字符统一为半角形式（ＡＢＣ１２３ → ABC123）
+  2. 转小写：使用 Unicode 默认小写映射，对应 Python str.lower() 和 JS toLowerCase()
+     （不用 casefold，JS 没有对应实现，ß 等字符会导致两边结果不一致）
+  3. 空白折叠：WHITESPACE 中的连续字符替换为一个半角空格，并去掉首尾空白
+
+JS 实现（与本文件保持一致）:
+  s.normalize('NFKC').toLowerCase().replace(/[\\t\\n\\v\\f\\r \\u0085\\u1680\\u2028\\u2029\\ufeff]+/g, ' ').trim()
+
+构建时把规范化后的 title / keywords / search_aliases 写入 data.json 的 "norm" 字段（见 catalog.Resource.norm），
+只保存与原文不同的字段，查询时读取 norm.xxx，缺失时直接使用原字段；查询词本身只需规范化一次
+"""
+
+import re
+import sys
+import unicodedata
+
+# NFKC 之后仍可能出现的空白字符（其余 Unicode 空格已被 NFKC 转成半角空格）
+WHITESPACE = "\t\n\v\f\r \u0085\u1680\u2028\u2029\ufeff"
+_WS_RE = re.compile(f"[{re.escape(WHITESPACE)}]+")
+
+
+def normalize(s):
+    """按上述规则规范化文本"""
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFKC", str(s)).lower()
+    return _WS_RE.sub(" ", s).strip(" ")
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        print(f"{arg!r} → {normalize(arg)!r}")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+令牌桶限流的 Python 参考实现，与 functions/lib/ratelimit.js 逻辑一致
+- 桶状态缓存在进程内 LRU，命中时不读 KV；冷 key 只读一次 KV，并发请求等待同一次读取
+- 同一 key 每个 flush_seconds 窗口最多写一次 KV，令牌耗尽时立即写入，被拒绝的请求不写 KV
+- 被 LRU 淘汰的桶如有未写入的变化，淘汰时写入 KV，写完之前仍以内存中的状态为准
+- 写 KV 串行进行，轮到时才读取桶的当前状态；写入失败时等 retry_seconds 重试，
+  仍失败则留到下一次请求（包括被拒绝的）再写
+- 可在多线程（ThreadingHTTPServer）中共用，KV 读写不持有状态锁
+- KV 记录带 expiration_ttl（桶装满所需时间，最少 60 秒），过期即视为满桶
+
+python ratelimit.py 会用 kv_store.MemoryKV 模拟一次突发请求，打印放行数和 KV 读写次数
+"""
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+
+KV_MIN_TTL_SECONDS = 60
+
+
+class TokenBucketLimiter:
+    def __init__(self, prefix, capacity, refill_seconds, flush_seconds=60, cache_size=1000, clock=time.time,
+                 retry_seconds=1.0, write_retries=1):
+        self.prefix = prefix
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds  # 补充一个令牌所需秒数
+        self.flush_seconds = flush_seconds
+        self.cache_size = cache_size
+        self.clock = clock
+        self.retry_seconds = retry_seconds  # Workers KV 同一 key 每秒只允许写一次
+        self.write_retries = write_retries
+        # key → [tokens, updated, flushed, version, saved]
+        # version 每次放行加一，saved 是已写入 KV 的 version，不相等说明有未写入的变化
+        self._cache = OrderedDict()
+        self._loading = {}  # key → threading.Event，正在从 KV 读取
+        self._unsaved = {}  # 被 LRU 淘汰但变化还没写入 KV 的桶，写完之前仍从这里读取
+        self._evicted = []  # 等待写入的被淘汰的桶 [(key, state)]
+        self._lock = threading.Lock()  # 保护以上容器和桶状态
+        self._write_lock = threading.Lock()  # 写 KV 串行进行，后写入的总是最新状态
+
+    def _remember(self, key, state):
+        """调用方需持有 self._lock"""
+        self._cache[key] = state
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            old_key, old_state = self._cache.popitem(last=False)
+            if old_state[3] != old_state[4]:
+                self._unsaved[old_key] = old_state
+                self._evicted.append((old_key, old_state))
+
+    def _load(self, kv, key, now):
+        """返回 key 的桶状态，缓存未命中时同一 key 只有一个线程读 KV"""
+        while True:
+            with self._lock:
+                state = self._cache.get(key) or self._unsaved.get(key)
+                if state is not None:
+                    return state
+                event = self._loading.get(key)
+                if event is None:
+                    event = self._loading[key] = threading.Event()
+                    break
+            # 其他线程正在读取，等它放进缓存后重试（期间被 LRU 淘汰则自己读）
+            event.wait()
+
+        state = self._read(kv, key, now)
+        with self._lock:
+            self._remember(key, state)
+            del self._loading[key]
+        event.set()
+        return state
+
+    def _read(self, kv, key, now):
+        data = None
+        try:
+            raw = kv.get(self.prefix + key)
+            data = json.loads(raw) if raw else None
+        except Exception as e:
+            print(f"读取限流状态失败: {e}")
+        if not isinstance(data, dict) or not isinstance(data.get("tokens"), (int, float)):
+            return [float(self.capacity), now, None, 0, 0]
+        return [float(data["tokens"]), data["updated"], None, 0, 0]
+
+    def take(self, kv, key):
+        """消耗一个令牌，返回 (allowed, retry_after_seconds)"""
+        now = self.clock()
+        state = self._load(kv, key, now)
+
+        with self._lock:
+            tokens, updated, flushed = state[:3]
+
+            # 按经过的时间补充令牌
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) / self.refill_seconds)
+            state[0], state[1] = tokens, max(now, updated)
+
+            if tokens < 1:
+                self._remember(key, state)
+                allowed, retry_after = False, (1 - tokens) * self.refill_seconds
+                # 之前的写入失败过，趁这次补写
+                flush = state[3] != state[4]
+            else:
+                state[0] = tokens - 1
+                state[3] += 1
+                # 令牌耗尽必须写入，其他进程 / 淘汰后重新加载时才能看到桶已空
+                flush = flushed is None or now - flushed >= self.flush_seconds or state[0] < 1
+                if flush:
+                    state[2] = now
+                self._remember(key, state)
+                allowed, retry_after = True, 0.0
+            evicted, self._evicted = self._evicted, []
+
+        if flush:
+            self._flush(kv, key, state)
+        for old_key, old_state in evicted:
+            self._flush(kv, old_key, old_state)
+        return allowed, retry_after
+
+    def _flush(self, kv, key, state):
+        with self._write_lock:
+            for attempt in range(self.write_retries + 1):
+                # 持有写锁后才读取状态，先开始的慢写入不会覆盖更新的状态
+                with self._lock:
+                    tokens, updated, version = state[0], state[1], state[3]
+                if version == state[4]:
+                    return
+                ttl = max(KV_MIN_TTL_SECONDS, math.ceil((self.capacity - tokens) * self.refill_seconds))
+                try:
+                    kv.put(self.prefix + key, json.dumps({"tokens": tokens, "updated": updated}), expiration_ttl=ttl)
+                except Exception as e:
+                    if attempt < self.write_retries:
+                        time.sleep(self.retry_seconds)
+                        continue
+                    print(f"保存限流状态失败: {e}")
+                    return
+                with self._lock:
+                    state[4] = version
+                    if state[3] == version and self._unsaved.get(key) is state:
+                        del self._unsaved[key]
+                return
+
+
+def ip_limiter(**kwargs):
+    """每个 IP 每小时 3 次"""
+    return TokenBucketLimiter("ratelimit:", capacity=3, refill_seconds=20 * 60, **kwargs)
+
+
+def keyword_limiter(**kwargs):
+    """同一关键词每天 1 次"""
+    return TokenBucketLimiter("keyword_req:", capacity=1, refill_seconds=24 * 60 * 60, **kwargs)
+
+
+if __name__ == "__main__":
+    from kv_store import CountingKV, MemoryKV
+
+    kv = CountingKV(MemoryKV())
+    limiter = ip_limiter()
+    allowed = sum(limiter.take(kv, "1.2.3.4")[0] for _ in range(1000))
+    print(f"同一 IP 突发 1000 次: 放行 {allowed} 次，KV 读 {kv.gets} 次 / 写 {kv.puts} 次")
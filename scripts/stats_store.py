@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+搜索统计时间序列（SQLite）
+每次从 /api/sync 拉到的统计作为一个快照追加保存，可以查询两次快照之间的变化、单个关键词的趋势，
+以及跨过 min_count 阈值（新进 / 跌出热门）的关键词，SEO 生成器据此只处理状态变化的关键词。
+
+用法: python stats_store.py [关键词]     # 打印最近两次快照的变化，或某个关键词的趋势
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+# 放在部署目录之外，不提交到仓库；CI 中通过 actions/cache 在两次运行之间保留
+DEFAULT_DB = os.path.join(SCRIPT_DIR, ".cache/stats.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    taken_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counts (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    keyword TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, keyword)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_taken_at ON snapshots(taken_at);
+CREATE INDEX IF NOT EXISTS idx_counts_keyword ON counts(keyword, snapshot_id);
+"""
+
+
+class StatsStore:
+    def __init__(self, path=DEFAULT_DB):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- 写入 ----------
+
+    def append_snapshot(self, stats, taken_at=None):
+        """追加一次统计快照，返回快照 id"""
+        taken_at = taken_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self.conn:
+            cur = self.conn.execute("INSERT INTO snapshots (taken_at) VALUES (?)", (taken_at,))
+            snapshot_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO counts (snapshot_id, keyword, count) VALUES (?, ?, ?)",
+                ((snapshot_id, k, int(c)) for k, c in stats.items() if isinstance(c, (int, float))),
+            )
+        return snapshot_id
+
+    # ---------- 查询 ----------
+
+    def snapshot_ids(self, limit=2):
+        """最近的快照 id，新的在前"""
+        rows = self.conn.execute("SELECT id FROM snapshots ORDER BY id DESC LIMIT ?", (limit,))
+        return [r[0] for r in rows]
+
+    def snapshot(self, snapshot_id):
+        rows = self.conn.execute("SELECT keyword, count FROM counts WHERE snapshot_id = ?", (snapshot_id,))
+        return dict(rows)
+
+    def deltas(self, old_id=None, new_id=None):
+        """两次快照之间计数变化的关键词 {关键词: (旧计数, 新计数)}，默认比较最近两次
+
+        /api/sync 只返回前 50 个热门词，不在快照中的关键词计数记为 0
+        """
+        if new_id is None or old_id is None:
+            ids = self.snapshot_ids(2)
+            if not ids:
+                return {}
+            new_id = ids[0] if new_id is None else new_id
+            old_id = (ids[1] if len(ids) > 1 else None) if old_id is None else old_id
+        new = self.snapshot(new_id)
+        old = self.snapshot(old_id) if old_id is not None else {}
+        return {
+            k: (old.get(k, 0), new.get(k, 0))
+            for k in old.keys() | new.keys()
+            if old.get(k, 0) != new.get(k, 0)
+        }
+
+    def crossings(self, min_count, old_id=None, new_id=None):
+        """跨过阈值的关键词，返回 (新进热门, 跌出热门)"""
+        up, down = [], []
+        for keyword, (old, new) in self.deltas(old_id, new_id).items():
+            if old < min_count <= new:
+                up.append(keyword)
+            elif new < min_count <= old:
+                down.append(keyword)
+        return sorted(up), sorted(down)
+
+    def trend(self, keyword, limit=30):
+        """关键词最近 limit 次快照中的计数 [(时间, 计数)]，旧的在前"""
+        rows = self.conn.execute(
+            """
+            SELECT s.taken_at, COALESCE(c.count, 0)
+            FROM snapshots s
+            LEFT JOIN counts c ON c.snapshot_id = s.id AND c.keyword = ?
+            ORDER BY s.id DESC LIMIT ?
+            """,
+            (keyword, limit),
+        ).fetchall()
+        return rows[::-1]
+
+
+if __name__ == "__main__":
+    store = StatsStore()
+    if len(sys.argv) > 1:
+        for taken_at, count in store.trend(sys.argv[1]):
+            print(f"{taken_at}  {count}")
+    else:
+        for keyword, (old, new) in sorted(store.deltas().items(), key=lambda x: x[1][1] - x[1][0], reverse=True):
+            print(f"{keyword}: {old} → {new} ({new - old:+d})")
+    store.close()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+监听模式：表格保存后自动增量构建
+监听 resources.xlsx / update.xlsx / data.json，合并连续保存后只执行受影响的构建步骤；
+资源列表、匹配索引（AliasIndex）、页面索引（含每个页面的内容哈希）、搜索统计常驻内存，不用每次重新读取；
+搜索统计每隔 --stats-interval 秒重新拉取，热门关键词或计数变化时重新生成受影响的页面
+
+用法: cd scripts && python watch_build.py [--debounce 2] [--poll] [--stats-interval 600]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+import build_resources
+import build_update
+import gen_seo_from_stats as seo
+from alias_index import AliasIndex
+from catalog import load_catalog
+from catalog_diff import catalog_fingerprint, load_json, load_page_index, save_page_index
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+WATCHED = {
+    "resources.xlsx": "resources",
+    "update.xlsx": "update",
+    "data.json": "data",
+}
+
+# inotify 常量（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+# ==================== 文件监听 ====================
+
+class InotifyWatcher:
+    """基于 inotify 监听项目根目录（编辑器常用「写临时文件再改名」方式保存，所以监听目录）"""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch 失败")
+
+    def wait(self, timeout):
+        """等待事件，返回发生变化的文件名集合"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        names = set()
+        offset = 0
+        while offset < len(buf):
+            _, _, _, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+            if name in WATCHED:
+                names.add(name)
+        return names
+
+
+class PollingWatcher:
+    """轮询 mtime，inotify 不可用（非 Linux）时使用"""
+
+    def __init__(self, directory, interval=1.0):
+        self.directory = directory
+        self.interval = interval
+        self.mtimes = self._scan()
+
+    def _scan(self):
+        mtimes = {}
+        for name in WATCHED:
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+                mtimes[name] = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                mtimes[name] = None
+        return mtimes
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        changed = {name for name in WATCHED if current[name] != self.mtimes[name]}
+        self.mtimes = current
+        return changed
+
+
+def create_watcher(directory, force_poll=False):
+    if not force_poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify 不可用，改用轮询: {e}")
+    return PollingWatcher(directory)
+
+
+def collect_burst(watcher, first, debounce):
+    """合并连续保存：直到 debounce 秒内没有新事件才返回"""
+    changed = set(first)
+    deadline = time.monotonic() + debounce
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return changed
+        more = watcher.wait(remaining)
+        if more:
+            changed |= more
+            deadline = time.monotonic() + debounce
+
+
+# ==================== 常驻状态 ====================
+
+class BuildState:
+    """两次构建之间保留在内存中的状态"""
+
+    def __init__(self):
+        data_file = seo.CONFIG['local']['data_file']
+        self.set_resources(load_catalog(data_file) if os.path.exists(data_file) else [])
+        self.page_index = load_page_index()
+        self.stats = self.fetch_stats()
+        self.hot_keywords = seo.select_hot_keywords(self.stats, seo.CONFIG['local']['min_count'])
+        self.stats_refreshed = time.monotonic()
+        print(f"📦 已加载 {len(self.resources)} 个资源，{len(self.hot_keywords)} 个热门关键词")
+
+    def set_resources(self, resources):
+        """资源变化时重建匹配索引和目录指纹"""
+        self.resources = resources
+        self.index = AliasIndex(resources)
+        self.fingerprint = catalog_fingerprint(resources)
+
+    @staticmethod
+    def fetch_stats():
+        return seo.get_stats_from_api() or load_json(
+            os.path.join(PROJECT_ROOT, "static/status.json"), {}
+        ).get("stats", {})
+
+    def rebuild_pages(self, changed_keywords=None):
+        generated_pages, new_pages = seo.build_pages(
+            self.hot_keywords, self.resources, self.page_index,
+            changed_keywords=changed_keywords, fingerprint=self.fingerprint, index=self.index,
+        )
+        save_page_index(new_pages, self.fingerprint)
+        # 跌出热门或不再匹配到资源的关键词删除页面
+        seo.remove_stale_pages(self.page_index["pages"], new_pages)
+        self.page_index = load_page_index()
+        if generated_pages:
+            seo.generate_index_page(generated_pages)
+            seo.generate_sitemap(generated_pages)
+
+    def refresh_stats(self):
+        """重新拉取搜索统计，热门关键词有变化时重新生成页面，返回是否重新生成"""
+        self.stats_refreshed = time.monotonic()
+        stats = self.fetch_stats()
+        if not stats:
+            return False
+        hot_keywords = seo.select_hot_keywords(stats, seo.CONFIG['local']['min_count'])
+        if hot_keywords == self.hot_keywords:
+            self.stats = stats
+            return False
+        old = dict(self.hot_keywords)
+        changed = {kw for kw, count in hot_keywords if old.get(kw) != count}
+        print(f"📈 搜索统计更新: {len(changed)} 个热门关键词新增或计数变化")
+        self.stats, self.hot_keywords = stats, hot_keywords
+        self.rebuild_pages(changed_keywords=changed)
+        return True
+
+    def on_resources(self):
+        data, _ = build_resources.build(previous=self.resources)
+        self.set_resources(data)
+        self.rebuild_pages()
+
+    def on_data(self):
+        """data.json 被外部修改（手动编辑、git pull 等）"""
+        data = load_catalog(seo.CONFIG['local']['data_file'])
+        if data == self.resources:
+            return
+        self.set_resources(data)
+        self.rebuild_pages()
+
+    def on_update(self):
+        build_update.build()
+
+
+def run_once(state, changed):
+    kinds = {WATCHED[name] for name in changed}
+    started = time.monotonic()
+    print(f"\n🔄 检测到变化: {', '.join(sorted(changed))}")
+    try:
+        # resources.xlsx 会重写 data.json，二者同时变化时只需处理前者
+        if "resources" in kinds:
+            state.on_resources()
+        elif "data" in kinds:
+            state.on_data()
+        if "update" in kinds:
+            state.on_update()
+    except Exception as e:
+        # 表格保存到一半时可能读取失败，等下次保存再试
+        print(f"❌ 构建失败: {e.__class__.__name__}: {e}")
+        return
+    print(f"✅ 增量构建完成，用时 {time.monotonic() - started:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="监听表格变化并增量构建")
+    parser.add_argument("--debounce", type=float, default=2.0, help="合并连续保存的等待秒数")
+    parser.add_argument("--poll", action="store_true", help="强制使用轮询而非 inotify")
+    parser.add_argument("--stats-interval", type=float, default=600, help="重新拉取搜索统计的间隔秒数，0 表示不刷新")
+    args = parser.parse_args()
+
+    # build_resources / build_update 使用相对 scripts 目录的路径
+    os.chdir(SCRIPT_DIR)
+
+    state = BuildState()
+    watcher = create_watcher(PROJECT_ROOT, force_poll=args.poll)
+    print(f"👀 监听 {', '.join(WATCHED)} ({watcher.__class__.__name__})，Ctrl+C 退出")
+
+    try:
+        while True:
+            timeout = 60
+            if args.stats_interval:
+                timeout = max(0, min(timeout, state.stats_refreshed + args.stats_interval - time.monotonic()))
+            changed = watcher.wait(timeout)
+            if args.stats_interval and time.monotonic() - state.stats_refreshed >= args.stats_interval:
+                try:
+                    state.refresh_stats()
+                except Exception as e:
+                    print(f"❌ 刷新搜索统计失败: {e.__class__.__name__}: {e}")
+            if not changed:
+                continue
+            changed = collect_burst(watcher, changed, args.debounce)
+            # 构建期间的保存留到下一轮处理；构建自身写 data.json 产生的事件由 on_data 比较后忽略
+            run_once(state, changed)
+    except KeyboardInterrupt:
+        print("\n👋 已停止监听")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# scripts/ 下的脚本互相按顶层模块导入（cd scripts && python xxx.py）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
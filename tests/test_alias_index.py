@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from alias_index import AhoCorasick, AliasIndex, SubstringIndex, match_resources
+from catalog import Resource
+from local_api import gap_matches
+from normalize import normalize
+
+LINK = "https://pan.quark.cn/s/x"
+
+CATALOG = [
+    Resource("1", "剧本杀合集", ["剧本杀", "推理"], ["本格推理", "剧本"], LINK),
+    Resource("2", "Ｔｈｅ Ｏｆｆｉｃｅ 办公室", ["美剧", "喜剧"], [], LINK),
+    Resource("3", "启蒙英语动画", ["英语", "启蒙"], [], LINK),
+    Resource("4", "猫岛循环谋杀", ["猫岛"], ["猫岛谋杀"], LINK),
+    Resource("5", "无别名资源", ["悬疑", "猫"], [], LINK),
+]
+
+
+def ids(resources):
+    return [r.id for r in resources]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return AliasIndex(CATALOG)
+
+
+# ---------- match：与 match_resources 一致 ----------
+
+def test_alias_contains_keyword(index):
+    # 关键词是别名的一部分
+    assert ids(index.match("本格")) == ["1"]
+
+
+def test_keyword_contains_alias(index):
+    # 别名出现在关键词中（Aho-Corasick 方向）
+    assert ids(index.match("我想找猫岛谋杀的资源")) == ["4"]
+    assert ids(index.match("剧本推荐")) == ["1"]
+
+
+def test_title_contains_keyword(index):
+    assert ids(index.match("ｏｆｆｉｃｅ")) == ["2"]
+    assert ids(index.match("动画")) == ["3"]
+
+
+def test_keywords_contain_keyword(index):
+    assert ids(index.match("美")) == ["2"]
+    assert ids(index.match("悬")) == ["5"]
+
+
+def test_keyword_direction_is_one_way_for_match(index):
+    # match 中关键词只做“关键词包含查询”，查询包含关键词不算
+    assert index.match("悬疑片大全") == []
+
+
+def test_result_in_catalog_order(index):
+    assert ids(index.match("猫")) == ["4", "5"]
+
+
+def test_empty_query_matches_everything(index):
+    assert ids(index.match("")) == ids(CATALOG)
+    assert ids(index.match("  ")) == ids(CATALOG)
+
+
+def test_no_match(index):
+    assert index.match("不存在") == []
+
+
+# ---------- gap_match：与 handleGap 一致 ----------
+
+def test_gap_alias_resource_only_checks_aliases(index):
+    # 资源 1 有别名，标题包含“合集”也不算命中
+    assert not index.gap_match("合集")
+    assert index.gap_match("本格")
+    assert index.gap_match("剧本推荐")
+
+
+def test_gap_resource_without_aliases(index):
+    assert index.gap_match("英语")            # 标题 / 关键词包含查询
+    assert index.gap_match("悬疑片大全")      # 查询包含关键词
+    assert not index.gap_match("纪录片")
+
+
+def test_gap_empty_query(index):
+    assert index.gap_match("")
+
+
+# ---------- 与逐条扫描的随机对比 ----------
+
+def random_catalog(rng, size=60, alphabet="剧本杀猫岛英语ab "):
+    def word(lo, hi):
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(lo, hi)))
+
+    return [
+        Resource(
+            str(i),
+            word(0, 8),
+            [word(0, 4) for _ in range(rng.randint(0, 3))],
+            [word(0, 4) for _ in range(rng.randint(0, 3))] if rng.random() < 0.5 else [],
+            LINK,
+        )
+        for i in range(size)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_against_scan(seed):
+    rng = random.Random(seed)
+    catalog = random_catalog(rng)
+    index = AliasIndex(catalog)
+    words = [w for r in catalog for w in (r.title, *r.keywords, *r.search_aliases)]
+    queries = [""] + [
+        rng.choice(words)[rng.randint(0, 2):] + (rng.choice(words) if rng.random() < 0.3 else "")
+        for _ in range(200)
+    ]
+    for query in queries:
+        assert ids(index.match(query)) == ids(match_resources(query, catalog)), query
+        q = normalize(query)
+        assert index.gap_match(q) == any(gap_matches(q, r) for r in catalog), query
+
+
+def test_automaton_and_substring_index_against_brute_force():
+    rng = random.Random(1)
+    for _ in range(300):
+        patterns = ["".join(rng.choice("ab") for _ in range(rng.randint(0, 5))) for _ in range(rng.randint(1, 15))]
+        automaton = AhoCorasick(patterns)
+        substrings = SubstringIndex(patterns)
+        for _ in range(20):
+            text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 9)))
+            assert automaton.find(text) == {i for i, p in enumerate(patterns) if p in text}
+            assert substrings.containing(text) == {i for i, p in enumerate(patterns) if text in p}
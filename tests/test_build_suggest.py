@@ -0,0 +1,84 @@
+from build_suggest import build_shards, collect_terms, shard_filename, write_shards
+from catalog import Resource
+
+LINK = "https://pan.quark.cn/s/x"
+
+CATALOG = [
+    Resource("1", "石头记", ["红楼梦"], [], LINK),
+    Resource("2", "猫岛循环谋杀", ["猫岛"], ["猫岛谋杀"], LINK),
+]
+
+
+# ---------- collect_terms ----------
+
+def test_hot_terms_must_match_a_resource():
+    terms = collect_terms(CATALOG, {"石头": 30, "石头剪刀布": 50})
+    assert terms["石头"] == ("石头", 30, "hot")
+    assert "石头剪刀布" not in terms
+
+
+def test_filtered_keywords_are_never_suggested():
+    catalog = CATALOG + [Resource("3", "加个v呗", ["剧本杀"], [], LINK)]
+    terms = collect_terms(catalog, {"剧本": 99, "加个v呗": 99})
+    assert "剧本" not in terms
+    assert "加个v呗" not in terms
+    assert "剧本杀" in terms
+
+
+def test_counts_are_merged_after_normalizing():
+    terms = collect_terms(CATALOG, {"猫岛": 3, " 猫岛 ": 2, "ＮＡＮ": "x"})
+    assert terms["猫岛"][1] == 5
+    # 热搜与关键词重复时来源记为 hot
+    assert terms["猫岛"][2] == "hot"
+
+
+def test_resource_fields_without_stats():
+    terms = collect_terms(CATALOG, {})
+    assert terms["石头记"] == ("石头记", 0, "title")
+    assert terms["红楼梦"][2] == "keyword"
+    assert terms["猫岛谋杀"][2] == "alias"
+
+
+# ---------- build_shards ----------
+
+def test_ranked_by_count_then_source_then_length():
+    terms = {
+        "ab": ("ab", 1, "keyword"),
+        "abc": ("abc", 5, "alias"),
+        "ad": ("ad", 1, "title"),
+        "a": ("a", 1, "title"),
+    }
+    shard = build_shards(terms)["a"]
+    assert [shard["t"][i] for i in shard["p"]["a"]] == ["abc", "a", "ad", "ab"]
+
+
+def test_each_prefix_keeps_top_n():
+    terms = {f"x{i}": (f"x{i}", 10 - i, "hot") for i in range(5)}
+    shard = build_shards(terms, limit=3)["x"]
+    assert [shard["t"][i] for i in shard["p"]["x"]] == ["x0", "x1", "x2"]
+    # 每个词自己的完整前缀仍能命中
+    assert [shard["t"][i] for i in shard["p"]["x4"]] == ["x4"]
+
+
+def test_terms_hidden_by_every_prefix_are_dropped():
+    terms = {"a": ("a", 3, "hot"), "ab": ("ab", 2, "hot"), "b": ("b", 1, "hot")}
+    shards = build_shards(terms, limit=1, max_prefix=1)
+    assert shards["a"]["t"] == ["a"]
+    assert shards["b"]["t"] == ["b"]
+
+
+def test_prefix_capped_at_max_prefix():
+    shard = build_shards({"abcdef": ("abcdef", 1, "title")}, max_prefix=3)["a"]
+    assert sorted(shard["p"]) == ["a", "ab", "abc"]
+
+
+# ---------- write_shards ----------
+
+def test_write_only_changed_and_remove_stale(tmp_path):
+    shards = build_shards({"a": ("a", 1, "hot"), "b": ("b", 1, "hot")})
+    assert write_shards(shards, str(tmp_path)) == (2, 0)
+    assert write_shards(shards, str(tmp_path)) == (0, 0)
+
+    del shards["b"]
+    assert write_shards(shards, str(tmp_path)) == (0, 1)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [shard_filename("a")]
@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+import build_update
+
+
+@pytest.fixture
+def updates(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_update, "updates_dir", str(tmp_path / "updates"))
+    monkeypatch.setattr(build_update, "update_json", str(tmp_path / "update.json"))
+    return tmp_path / "updates"
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2026-02-21", "2026-02-21"),
+    ("2026/2/21", "2026-02-21"),
+    ("2026.2.1", "2026-02-01"),
+    ("2026年2月21日", "2026-02-21"),
+    (" 2026-02-21 00:00:00 ", "2026-02-21"),
+    ("2026-02-30", None),
+    ("21/2/2026", None),
+    ("nan", None),
+    ("", None),
+])
+def test_format_date(value, expected):
+    assert build_update.format_date(value) == expected
+
+
+def test_format_date_timestamp():
+    from datetime import datetime
+    assert build_update.format_date(datetime(2026, 2, 21, 8, 0)) == "2026-02-21"
+
+
+def test_merge_dedupes_and_sorts():
+    rows = [{"name": "a", "date": "2026-03-01"}, {"name": "c", "date": "2026-02-01"}]
+    previous = [{"name": "a", "date": "2026-03-01"}, {"name": "b", "date": "2026-02-15"}]
+    assert build_update.merge_feed(rows, previous) == [
+        {"name": "a", "date": "2026-03-01"},
+        {"name": "b", "date": "2026-02-15"},
+        {"name": "c", "date": "2026-02-01"},
+    ]
+
+
+def test_load_feed_normalizes_and_skips_bad_dates(tmp_path):
+    path = tmp_path / "update.json"
+    path.write_text(json.dumps([
+        {"name": "a", "date": "2026/2/21"},
+        {"name": "b", "date": "不知道"},
+        {"date": "2026-02-21"},
+    ]), encoding="utf-8")
+    assert build_update.load_feed(str(path)) == [{"name": "a", "date": "2026-02-21"}]
+
+
+def test_archives_latest_and_index(updates, monkeypatch):
+    monkeypatch.setattr(build_update, "LATEST_COUNT", 2)
+    feed = build_update.merge_feed([
+        {"name": "a", "date": "2026-03-02"},
+        {"name": "b", "date": "2026-03-01"},
+        {"name": "c", "date": "2026-03-01"},
+    ], [])
+    written = build_update.write_archives(feed, today="2026-03-02")
+    assert sorted(written) == ["2026-03-01.json", "2026-03-02.json", "index.json", "latest.json"]
+    assert read(updates / "latest.json") == feed[:2]
+    assert read(updates / "index.json") == [{"date": "2026-03-02", "count": 1}, {"date": "2026-03-01", "count": 2}]
+
+    # 没有变化时不写文件
+    assert build_update.write_archives(feed, today="2026-03-02") == []
+
+
+def test_sealed_archive_is_not_rewritten(updates, capsys):
+    os.makedirs(updates)
+    (updates / "2026-02-21.json").write_text(
+        json.dumps([{"name": "old", "date": "2026-02-21"}], ensure_ascii=False), encoding="utf-8"
+    )
+    feed = [{"name": "late", "date": "2026-02-21"}, {"name": "old", "date": "2026-02-21"}]
+    build_update.write_archives(feed, today="2026-03-01")
+
+    assert read(updates / "2026-02-21.json") == [{"name": "old", "date": "2026-02-21"}]
+    # index.json 与归档文件一致
+    assert read(updates / "index.json") == [{"date": "2026-02-21", "count": 1}]
+    assert "late" in capsys.readouterr().out
+
+
+def test_today_archive_is_still_updated(updates):
+    build_update.write_archives([{"name": "a", "date": "2026-03-01"}], today="2026-03-01")
+    feed = [{"name": "a", "date": "2026-03-01"}, {"name": "b", "date": "2026-03-01"}]
+    assert "2026-03-01.json" in build_update.write_archives(feed, today="2026-03-01")
+    assert len(read(updates / "2026-03-01.json")) == 2
+
+
+def test_build_merges_with_previous(updates, monkeypatch):
+    with open(build_update.update_json, "w", encoding="utf-8") as f:
+        json.dump([{"name": "old", "date": "2026-02-21"}], f)
+    monkeypatch.setattr(build_update, "read_sheet", lambda: [{"name": "new", "date": "2026-03-01"}])
+    data = build_update.build()
+    assert [item["name"] for item in data] == ["new", "old"]
+    assert read(build_update.update_json) == data
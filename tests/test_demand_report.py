@@ -0,0 +1,76 @@
+import json
+import os
+
+from catalog import Resource, dump_catalog
+from demand_report import aggregate, build_report, load_state, refresh_matches
+
+
+def write_log(path, keywords, mode="w", tail=""):
+    with open(path, mode, encoding="utf-8") as f:
+        for keyword in keywords:
+            f.write(json.dumps({"keyword": keyword, "time": "t"}, ensure_ascii=False) + "\n")
+        f.write(tail)
+
+
+def counts(state):
+    return {k: v[0] for k, v in state["keywords"].items()}
+
+
+def test_incremental_and_partial_line(tmp_path):
+    log = str(tmp_path / "requests.jsonl")
+    write_log(log, ["剧本杀", "ＡＢＣ"], tail='{"keyword": "半')
+    state = load_state(full=True)
+
+    assert aggregate(log, state) == 2
+    assert counts(state) == {"剧本杀": 1, "abc": 1}
+
+    # 没有新行时不重复计数
+    assert aggregate(log, state) == 0
+
+    with open(log, "a", encoding="utf-8") as f:
+        f.write('行"}\n\nnot json\n{"request_id": "x"}\n')
+    assert aggregate(log, state) == 1
+    assert counts(state) == {"剧本杀": 1, "abc": 1, "半行": 1}
+    assert state["offset"] == os.path.getsize(log)
+
+
+def test_rotated_to_longer_file(tmp_path):
+    log = str(tmp_path / "requests.jsonl")
+    write_log(log, ["a"])
+    state = load_state(full=True)
+    aggregate(log, state)
+
+    # 新文件（新 inode）比旧的检查点长
+    new = str(tmp_path / "new.jsonl")
+    write_log(new, ["b", "c", "d", "e"])
+    os.replace(new, log)
+    assert aggregate(log, state) == 4
+    assert counts(state) == {"a": 1, "b": 1, "c": 1, "d": 1, "e": 1}
+
+
+def test_truncated_and_rewritten_in_place(tmp_path):
+    log = str(tmp_path / "requests.jsonl")
+    write_log(log, ["a", "b"])
+    state = load_state(full=True)
+    aggregate(log, state)
+
+    # 同一个 inode 被截断后重新写入更长的内容
+    write_log(log, ["xx", "yy", "zz", "ww"])
+    assert aggregate(log, state) == 4
+    assert counts(state) == {"a": 1, "b": 1, "xx": 1, "yy": 1, "zz": 1, "ww": 1}
+
+
+def test_matches_and_report(tmp_path):
+    log = str(tmp_path / "requests.jsonl")
+    write_log(log, ["剧本", "剧本", "没有的"])
+    data = str(tmp_path / "data.json")
+    dump_catalog([Resource("1", "剧本杀合集", ["剧本杀"], [], "https://pan.quark.cn/s/a")], data)
+
+    state = load_state(full=True)
+    aggregate(log, state)
+    assert refresh_matches(state, data) == 2
+    assert refresh_matches(state, data) == 0
+
+    report = build_report(state)
+    assert report["total"] == 3
+    assert report["rows"] == [["剧本", 2, 1, "t"], ["没有的", 1, 0, "t"]]
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from load_test import HTTPConnection
+
+
+async def serve_dropping_first(received):
+    """第一个请求读完后不回复直接断开（请求已被处理），之后正常回复"""
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                break
+            received.append(head.split(b"\r\n")[0].decode())
+            if len(received) == 1:
+                break
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def run(retry, received):
+    async def main():
+        server = await serve_dropping_first(received)
+        port = server.sockets[0].getsockname()[1]
+        conn = HTTPConnection(f"http://127.0.0.1:{port}", timeout=5)
+        try:
+            return await conn.request("GET", "/api/record?q=x", retry=retry)
+        finally:
+            conn.close()
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(main())
+
+
+def test_idempotent_request_is_retried_after_disconnect():
+    received = []
+    assert run(True, received) == (200, b"ok")
+    assert len(received) == 2
+
+
+def test_non_idempotent_request_is_not_retried():
+    received = []
+    with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+        run(False, received)
+    # 服务端已经处理过一次，不能再发
+    assert len(received) == 1
@@ -0,0 +1,209 @@
+import json
+import os
+
+import pytest
+
+import local_api
+from catalog import Resource, dump_catalog
+from kv_store import CountingKV, FlakyKV, MemoryKV
+from local_api import SYNC_KEY, LocalAPI, Request
+
+LINK = "https://pan.quark.cn/s/x"
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    dump_catalog([
+        Resource("1", "剧本杀合集", ["剧本杀"], [], LINK),
+        Resource("2", "猫岛循环谋杀", ["猫岛"], ["猫岛谋杀"], LINK),
+    ], path)
+    return path
+
+
+def make_api(data_file, kv=None, **kwargs):
+    notified = []
+    api = LocalAPI(kv or MemoryKV(), data_file=data_file, notify=notified.append, **kwargs)
+    return api, notified
+
+
+def call(api, method, url, body=None, headers=None):
+    if isinstance(body, dict):
+        body = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json", **(headers or {})}
+    response = api.handle(Request(method, url, headers, body))
+    try:
+        payload = json.loads(response.body.decode("utf-8"))
+    except ValueError:
+        payload = response.body.decode("utf-8")
+    return response.status, payload
+
+
+def seed(api, stats):
+    api.kv.put("stats", json.dumps(stats, ensure_ascii=False))
+
+
+# ---------- 路由 ----------
+
+def test_unknown_paths(data_file):
+    api, _ = make_api(data_file)
+    assert call(api, "GET", "/other")[0] == 404
+    status, body = call(api, "GET", "/api/nope")
+    assert status == 404 and "/api/record" in body["available"]
+    assert call(api, "OPTIONS", "/api/record") == (200, "")
+
+
+# ---------- /api/record ----------
+
+def test_record_get_and_post_forms(data_file):
+    api, _ = make_api(data_file)
+    status, body = call(api, "GET", "/api/record?q=%20Ｃａｔ%20")
+    assert status == 200
+    assert body["keyword"] == "cat" and body["count"] == 1
+    assert set(body) == {"success", "keyword", "count", "method", "timestamp", "isHot", "hotLevel"}
+
+    assert call(api, "POST", "/api/record", {"q": "cat"})[1]["count"] == 2
+    status, body = call(api, "POST", "/api/record", "cat".encode(), {"Content-Type": "text/plain"})
+    assert body["count"] == 3
+    status, body = call(api, "POST", "/api/record", b"keyword=cat",
+                        {"Content-Type": "application/x-www-form-urlencoded"})
+    assert body["count"] == 4
+    assert json.loads(api.kv.get("stats")) == {"cat": 4}
+
+
+def test_record_errors(data_file):
+    api, _ = make_api(data_file)
+    assert call(api, "GET", "/api/record")[1]["error"] == "Missing keyword"
+    assert call(api, "PUT", "/api/record?q=x")[0] == 405
+    status, body = call(api, "POST", "/api/record", b"{bad", {"Content-Type": "application/json"})
+    assert (status, body["error"]) == (400, "Parse error")
+    status, body = call(api, "GET", "/api/record?q=" + "a" * 101)
+    assert (status, body["receivedLength"]) == (400, 101)
+
+
+def test_record_hot_level(data_file):
+    api, _ = make_api(data_file)
+    seed(api, {"cat": 9})
+    body = call(api, "GET", "/api/record?q=cat")[1]
+    assert (body["count"], body["isHot"], body["hotLevel"]) == (10, True, "👍")
+
+
+def test_record_survives_kv_failures(data_file):
+    # 与线上一致：读失败当作空表，写失败只打印，仍返回成功
+    api, _ = make_api(data_file, FlakyKV(MemoryKV(), failure_rate=1.0))
+    status, body = call(api, "GET", "/api/record?q=cat")
+    assert (status, body["success"], body["count"]) == (200, True, 1)
+
+
+# ---------- /api/hot /api/sync ----------
+
+def test_hot_threshold_and_order(data_file):
+    api, _ = make_api(data_file)
+    seed(api, {"a": 9, "b": 10, "c": 60})
+    assert call(api, "GET", "/api/hot") == (200, [
+        {"word": "c", "count": 60, "isHot": True, "level": "🔥🔥"},
+        {"word": "b", "count": 10, "isHot": False, "level": "👍"},
+    ])
+
+
+def test_hot_with_failing_kv_is_empty(data_file):
+    api, _ = make_api(data_file, FlakyKV(MemoryKV(), failure_rate=1.0))
+    assert call(api, "GET", "/api/hot") == (200, [])
+
+
+def test_sync_requires_key(data_file):
+    api, _ = make_api(data_file)
+    seed(api, {"a": 9, "b": 10, "c": 60})
+    assert call(api, "GET", "/api/sync")[0] == 401
+    status, body = call(api, "GET", f"/api/sync?key={SYNC_KEY}")
+    assert status == 200
+    assert (body["success"], body["count"], body["stats"]) == (True, 2, {"c": 60, "b": 10})
+    assert list(body["stats"]) == ["c", "b"]
+
+
+# ---------- /api/gap ----------
+
+def test_gap_lists_unmatched_keywords(data_file):
+    api, _ = make_api(data_file)
+    seed(api, {"剧本杀": 50, "猫岛谋杀案": 8, "纪录片": 20, "冷门": 4})
+    status, body = call(api, "GET", "/api/gap")
+    assert status == 200
+    assert [g["word"] for g in body] == ["纪录片"]
+    assert set(body[0]) == {"word", "count", "level", "reason", "first_seen"}
+
+
+def test_gap_index_is_cached_until_data_changes(data_file, monkeypatch):
+    api, _ = make_api(data_file)
+    seed(api, {"纪录片": 20})
+    loads = []
+    original = local_api.load_catalog
+    monkeypatch.setattr(local_api, "load_catalog", lambda path: loads.append(path) or original(path))
+
+    call(api, "GET", "/api/gap")
+    call(api, "GET", "/api/gap")
+    assert len(loads) == 1
+
+    dump_catalog([Resource("3", "纪录片合集", ["纪录片"], [], LINK)], data_file)
+    os.utime(data_file, ns=(0, os.stat(data_file).st_mtime_ns + 10 ** 9))
+    assert call(api, "GET", "/api/gap")[1] == []
+    assert len(loads) == 2
+
+
+def test_gap_without_data_file(tmp_path):
+    api, _ = make_api(str(tmp_path / "missing.json"))
+    seed(api, {"剧本杀": 50})
+    assert [g["word"] for g in call(api, "GET", "/api/gap")[1]] == ["剧本杀"]
+
+
+# ---------- /api/request ----------
+
+def test_request_notifies_and_logs(data_file, tmp_path):
+    log = str(tmp_path / "requests.jsonl")
+    api, notified = make_api(data_file, request_log=log)
+    status, body = call(api, "POST", "/api/request", {"keyword": " 纪录片 "})
+    assert (status, body["success"]) == (200, True)
+    assert "关键词：纪录片" in notified[0]
+    with open(log, "r", encoding="utf-8") as f:
+        assert json.loads(f.readline())["keyword"] == "纪录片"
+
+
+def test_request_validation(data_file):
+    api, notified = make_api(data_file)
+    assert call(api, "GET", "/api/request")[0] == 405
+    assert call(api, "POST", "/api/request", b"{bad")[1]["error"] == "Invalid JSON"
+    assert call(api, "POST", "/api/request", {"keyword": "  "})[0] == 400
+    assert notified == []
+
+
+def test_request_rate_limits(data_file):
+    api, notified = make_api(data_file)
+    # 同一关键词每天一次（不区分大小写）
+    assert call(api, "POST", "/api/request", {"keyword": "ABC"})[0] == 200
+    status, body = call(api, "POST", "/api/request", {"keyword": "abc"})
+    assert status == 429 and "明天" in body["error"]
+
+    # 同一 IP 每小时 3 次，按 cf-connecting-ip 区分
+    headers = {"CF-Connecting-IP": "1.2.3.4"}
+    statuses = [call(api, "POST", "/api/request", {"keyword": f"k{i}"}, headers)[0] for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    assert call(api, "POST", "/api/request", {"keyword": "k9"}, {"CF-Connecting-IP": "5.6.7.8"})[0] == 200
+    assert len(notified) == 5
+
+
+def test_request_with_failing_kv_still_limits_in_process(data_file):
+    # KV 读写全部失败时限流退回进程内的状态
+    kv = CountingKV(FlakyKV(MemoryKV(), failure_rate=1.0))
+    api, _ = make_api(data_file, kv)
+    api.ip_limiter.retry_seconds = api.keyword_limiter.retry_seconds = 0
+    statuses = [call(api, "POST", "/api/request", {"keyword": f"k{i}"})[0] for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_request_webhook_failure(data_file):
+    def broken(content):
+        raise OSError("webhook down")
+
+    api = LocalAPI(MemoryKV(), data_file=data_file, notify=broken)
+    status, body = call(api, "POST", "/api/request", {"keyword": "x"})
+    assert status == 500
+    assert body["detail"] == "webhook down"
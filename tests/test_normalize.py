@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from catalog import Resource, dump_catalog, iter_resources, load_catalog
+from normalize import normalize
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(TESTS_DIR)
+
+# 固定用例同时用于校验 index.html 和 [[path]].js 中的 normalizeText
+with open(os.path.join(TESTS_DIR, "normalize_cases.json"), "r", encoding="utf-8") as f:
+    CASES = json.load(f)
+
+JS_COPIES = ["index.html", os.path.join("functions", "api", "[[path]].js")]
+
+
+@pytest.mark.parametrize("text, expected", CASES)
+def test_normalize_cases(text, expected):
+    assert normalize(text) == expected
+
+
+def test_fullwidth_to_halfwidth():
+    assert normalize("ＡＢＣ１２３") == "abc123"
+
+
+def test_lowercase():
+    assert normalize("The Office") == "the office"
+
+
+def test_whitespace_collapse():
+    assert normalize(" a \t\n b　　c ") == "a b c"
+
+
+@pytest.mark.parametrize("value", [None, "", "  ", "\t\n"])
+def test_empty_input(value):
+    assert normalize(value) == ""
+
+
+def test_idempotent():
+    for text, expected in CASES:
+        assert normalize(expected) == expected
+
+
+def extract_normalize_text(path):
+    with open(os.path.join(PROJECT_ROOT, path), "r", encoding="utf-8") as f:
+        source = f.read()
+    match = re.search(r"function normalizeText\(s\) \{.*?\n\}", source, re.S)
+    assert match, f"{path} 中找不到 normalizeText"
+    return match.group(0)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="需要 node")
+@pytest.mark.parametrize("path", JS_COPIES)
+def test_js_copies_match_cases(path):
+    script = (
+        extract_normalize_text(path)
+        + "\nconst cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        + "\nprocess.stdout.write(JSON.stringify(cases.map(([s]) => normalizeText(s))));"
+    )
+    result = subprocess.run(
+        ["node", "-e", script],
+        input=json.dumps(CASES), capture_output=True, text=True, encoding="utf-8", check=True,
+    )
+    assert json.loads(result.stdout) == [expected for _, expected in CASES]
+
+
+# ---------- Resource.norm() / to_dict() ----------
+
+def test_norm_only_keeps_changed_fields():
+    r = Resource("1", "Ｆｏｏ　Bar", ["剧本杀", "ＡＢＣ"], [], "https://pan.quark.cn/s/abc")
+    assert r.norm() == {"title": "foo bar", "keywords": ["剧本杀", "abc"]}
+    assert r.to_dict()["norm"] == r.norm()
+
+
+def test_no_norm_when_already_normalized():
+    r = Resource("2", "剧本杀", ["剧本杀"], ["本格"], "https://pan.quark.cn/s/abc")
+    assert r.norm() == {}
+    assert "norm" not in r.to_dict()
+
+
+def test_to_dict_round_trip():
+    d = {
+        "id": "3",
+        "title": "Ｔｅｓｔ",
+        "keywords": ["A"],
+        "search_aliases": ["ｂ"],
+        "share_link": "https://pan.quark.cn/s/xyz",
+        "qrcode": "static/qrcode/3.png",
+        "norm": {"title": "test", "keywords": ["a"], "search_aliases": ["b"]},
+    }
+    assert Resource.from_dict(d).to_dict() == d
+
+
+def test_data_json_round_trip(tmp_path):
+    data_file = os.path.join(PROJECT_ROOT, "data.json")
+    with open(data_file, "r", encoding="utf-8") as f:
+        original = json.load(f)
+
+    resources = load_catalog(data_file)
+    assert [r.to_dict() for r in resources] == original
+
+    out = tmp_path / "data.json"
+    dump_catalog(resources, str(out))
+    assert list(iter_resources(str(out))) == resources
+    with open(out, "r", encoding="utf-8") as f:
+        assert json.load(f) == original
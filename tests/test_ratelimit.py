@@ -0,0 +1,305 @@
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from kv_store import CountingKV, FlakyKV, KVError, MemoryKV
+from ratelimit import KV_MIN_TTL_SECONDS, TokenBucketLimiter, ip_limiter
+
+REFILL = 20 * 60
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def make(clock, **kwargs):
+    kv = CountingKV(MemoryKV(clock=clock))
+    return kv, ip_limiter(clock=clock, **kwargs)
+
+
+def test_capacity_then_reject():
+    clock = FakeClock()
+    kv, limiter = make(clock)
+    assert [limiter.take(kv, "ip")[0] for _ in range(4)] == [True, True, True, False]
+    allowed, retry_after = limiter.take(kv, "ip")
+    assert not allowed
+    assert retry_after == REFILL
+
+
+def test_refill():
+    clock = FakeClock()
+    kv, limiter = make(clock)
+    for _ in range(3):
+        limiter.take(kv, "ip")
+    clock.advance(REFILL / 2)
+    allowed, retry_after = limiter.take(kv, "ip")
+    assert not allowed and retry_after == REFILL / 2
+    clock.advance(REFILL / 2)
+    assert limiter.take(kv, "ip")[0]
+    assert not limiter.take(kv, "ip")[0]
+    # 补充不会超过容量
+    clock.advance(REFILL * 10)
+    assert [limiter.take(kv, "ip")[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_keys_are_independent():
+    clock = FakeClock()
+    kv, limiter = make(clock)
+    for _ in range(3):
+        limiter.take(kv, "a")
+    assert not limiter.take(kv, "a")[0]
+    assert limiter.take(kv, "b")[0]
+
+
+def test_kv_reads_and_writes_per_window():
+    clock = FakeClock()
+    kv = CountingKV(MemoryKV(clock=clock))
+    limiter = TokenBucketLimiter("t:", capacity=100, refill_seconds=1, flush_seconds=60, clock=clock)
+
+    for _ in range(10):
+        assert limiter.take(kv, "ip")[0]
+    assert (kv.gets, kv.puts) == (1, 1)
+
+    clock.advance(30)
+    limiter.take(kv, "ip")
+    assert (kv.gets, kv.puts) == (1, 1)
+
+    clock.advance(30)
+    limiter.take(kv, "ip")
+    assert (kv.gets, kv.puts) == (1, 2)
+
+
+def test_rejected_requests_do_not_write():
+    clock = FakeClock()
+    kv, limiter = make(clock)
+    for _ in range(3):
+        limiter.take(kv, "ip")
+    puts = kv.puts
+    for _ in range(100):
+        limiter.take(kv, "ip")
+    assert kv.puts == puts
+
+
+def test_drained_bucket_is_flushed():
+    clock = FakeClock()
+    kv, limiter = make(clock)
+    for _ in range(3):
+        limiter.take(kv, "ip")
+    # 第一次和耗尽时各写一次
+    assert kv.puts == 2
+    assert json.loads(kv.get("ratelimit:ip"))["tokens"] < 1
+
+    # 另一个进程（或缓存被淘汰后）读到的是空桶
+    other = ip_limiter(clock=clock)
+    assert not other.take(kv, "ip")[0]
+
+
+def test_eviction_reloads_drained_state():
+    clock = FakeClock()
+    kv, limiter = make(clock, cache_size=1)
+    for _ in range(3):
+        limiter.take(kv, "a")
+    limiter.take(kv, "b")  # 把 a 挤出缓存
+    assert not limiter.take(kv, "a")[0]
+
+
+def test_eviction_writes_unsaved_changes():
+    clock = FakeClock()
+    kv = CountingKV(MemoryKV(clock=clock))
+    limiter = TokenBucketLimiter("t:", capacity=3, refill_seconds=REFILL, cache_size=1, clock=clock)
+    limiter.take(kv, "a")
+    limiter.take(kv, "a")  # 同一窗口内，只改了内存
+    assert json.loads(kv.get("t:a"))["tokens"] == 2
+
+    limiter.take(kv, "b")  # 淘汰 a 时写入
+    assert json.loads(kv.get("t:a"))["tokens"] == 1
+    assert limiter.take(kv, "a")[0]
+    assert not limiter.take(kv, "a")[0]
+
+
+def test_ttl_expiry_resets_bucket():
+    clock = FakeClock()
+    kv, limiter = make(clock)
+    for _ in range(3):
+        limiter.take(kv, "ip")
+
+    # TTL 为桶装满所需时间
+    clock.advance(3 * REFILL - 1)
+    assert kv.get("ratelimit:ip") is not None
+    clock.advance(1)
+    assert kv.get("ratelimit:ip") is None
+    assert ip_limiter(clock=clock).take(kv, "ip")[0]
+
+
+def test_ttl_has_minimum():
+    clock = FakeClock()
+    kv = MemoryKV(clock=clock)
+    limiter = TokenBucketLimiter("t:", capacity=10, refill_seconds=1, clock=clock)
+    limiter.take(kv, "ip")
+    clock.advance(KV_MIN_TTL_SECONDS - 1)
+    assert kv.get("t:ip") is not None
+
+
+def test_concurrent_burst_on_cold_key():
+    kv = CountingKV(FlakyKV(MemoryKV(), latency=0.01))
+    limiter = ip_limiter()
+    barrier = threading.Barrier(50)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(limiter.take(kv, "1.2.3.4")[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count(True) == 3
+    assert kv.gets == 1
+    assert kv.puts == 2
+    assert json.loads(kv.get("ratelimit:1.2.3.4"))["tokens"] < 1
+
+
+def test_concurrent_many_keys():
+    kv = CountingKV(FlakyKV(MemoryKV(), latency=0.001))
+    limiter = TokenBucketLimiter("t:", capacity=2, refill_seconds=3600, cache_size=5)
+    results = {}
+    lock = threading.Lock()
+
+    def worker(i):
+        key = f"k{i % 20}"
+        allowed = limiter.take(kv, key)[0]
+        with lock:
+            results.setdefault(key, []).append(allowed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(200)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # 缓存很小、频繁淘汰；淘汰的桶写入 KV 前仍从内存读取，每个 key 最多放行容量个
+    assert all(r.count(True) <= 2 for r in results.values())
+    assert all(r.count(True) >= 1 for r in results.values())
+
+
+class FailingKV(MemoryKV):
+    """前 failures 次写入失败，模拟 KV 同一 key 一秒内的第二次写入被拒绝"""
+
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+
+    def put(self, key, value, expiration_ttl=None):
+        if self.failures:
+            self.failures -= 1
+            raise KVError("429 Too Many Requests")
+        super().put(key, value, expiration_ttl)
+
+
+def test_failed_write_is_retried():
+    clock = FakeClock()
+    kv = FailingKV(1, clock=clock)
+    limiter = ip_limiter(clock=clock, retry_seconds=0)
+    limiter.take(kv, "ip")
+    assert json.loads(kv.get("ratelimit:ip"))["tokens"] == 2
+
+
+def test_drained_write_lost_is_written_by_rejected_request():
+    clock = FakeClock()
+    kv = FailingKV(0, clock=clock)
+    limiter = ip_limiter(clock=clock, retry_seconds=0)
+    limiter.take(kv, "ip")
+    limiter.take(kv, "ip")
+    kv.failures = 2  # 耗尽时的写入和重试都失败
+    limiter.take(kv, "ip")
+    assert json.loads(kv.get("ratelimit:ip"))["tokens"] == 2
+
+    assert not limiter.take(kv, "ip")[0]
+    assert json.loads(kv.get("ratelimit:ip"))["tokens"] < 1
+    assert not ip_limiter(clock=clock).take(kv, "ip")[0]
+
+
+# ---------- functions/lib/ratelimit.js ----------
+
+JS_LIMITER = os.path.join(PROJECT_ROOT, "functions", "lib", "ratelimit.js")
+
+JS_KV = """
+const store = new Map();
+let puts = 0;
+const kv = {
+    async get(key) { return store.has(key) ? JSON.parse(store.get(key)) : null; },
+    async put(key, value) {
+        const n = puts++;
+        await hook(n);
+        store.set(key, value);
+    },
+};
+const sleep = ms => new Promise(r => setTimeout(r, ms));
+"""
+
+
+def run_js(hook, body):
+    script = (
+        f"import {{ createRateLimiter }} from {json.dumps(pathlib.Path(JS_LIMITER).as_uri())};\n"
+        + JS_KV
+        + f"const hook = {hook};\n"
+        + "const limiter = createRateLimiter({ prefix: 'r:', capacity: 3, refillMs: 20 * 60 * 1000, retryMs: 5 });\n"
+        + body
+    )
+    result = subprocess.run(
+        ["node", "--input-type=module", "-e", script],
+        capture_output=True, text=True, encoding="utf-8", check=True,
+    )
+    return json.loads(result.stdout)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="需要 node")
+def test_js_slow_first_write_does_not_overwrite_drained_state():
+    out = run_js(
+        "async n => { if (n === 0) await sleep(50); }",
+        "const results = await Promise.all([1, 2, 3, 4].map(() => limiter.take(kv, 'ip', 1000)));\n"
+        "console.log(JSON.stringify({ allowed: results.filter(r => r.allowed).length, "
+        "tokens: JSON.parse(store.get('r:ip')).tokens }));",
+    )
+    assert out["allowed"] == 3
+    assert out["tokens"] < 1
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="需要 node")
+def test_js_rejected_write_is_retried():
+    # 第二次写入（耗尽时）被拒绝，等 retryMs 后重试
+    out = run_js(
+        "async n => { if (n === 1) throw new Error('429'); }",
+        "for (let i = 0; i < 3; i++) await limiter.take(kv, 'ip', 1000);\n"
+        "console.log(JSON.stringify({ tokens: JSON.parse(store.get('r:ip')).tokens, puts }));",
+    )
+    assert out == {"tokens": 0, "puts": 3}
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="需要 node")
+def test_js_lost_drained_write_is_written_by_rejected_request():
+    out = run_js(
+        "async n => { if (n === 1 || n === 2) throw new Error('429'); }",
+        "for (let i = 0; i < 3; i++) await limiter.take(kv, 'ip', 1000);\n"
+        "const before = JSON.parse(store.get('r:ip')).tokens;\n"
+        "const rejected = await limiter.take(kv, 'ip', 1000);\n"
+        "console.log(JSON.stringify({ before, allowed: rejected.allowed, "
+        "after: JSON.parse(store.get('r:ip')).tokens }));",
+    )
+    assert out == {"before": 2, "allowed": False, "after": 0}
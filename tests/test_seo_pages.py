@@ -0,0 +1,165 @@
+import os
+
+import pytest
+
+import gen_seo_from_stats as seo
+from catalog import Resource
+from catalog_diff import catalog_fingerprint
+
+LINK = "https://pan.quark.cn/s/"
+
+
+def catalog(title1="剧本杀合集", link1="a"):
+    return [
+        Resource("1", title1, ["剧本杀"], [], LINK + link1),
+        Resource("2", "剧本杀进阶", ["剧本杀"], [], LINK + "b"),
+        Resource("3", "启蒙英语", ["英语"], [], LINK + "c"),
+    ]
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.setitem(seo.CONFIG["local"], "output_dir", str(tmp_path))
+    rendered = []
+    original = seo.generate_seo_page
+
+    def counting(keyword, count, resources):
+        rendered.append(keyword)
+        return original(keyword, count, resources)
+
+    monkeypatch.setattr(seo, "generate_seo_page", counting)
+    return rendered
+
+
+def build(resources, page_index, changed_keywords=None, hot=(("剧本杀", 30), ("英语", 10))):
+    fingerprint = catalog_fingerprint(resources)
+    _, pages = seo.build_pages(list(hot), resources, page_index, changed_keywords=changed_keywords,
+                               fingerprint=fingerprint)
+    return {"catalog": fingerprint, "pages": pages}
+
+
+def test_unchanged_pages_are_not_rendered(site):
+    index = build(catalog(), {"pages": {}})
+    assert sorted(site) == ["剧本杀", "英语"]
+    site.clear()
+    build(catalog(), index, changed_keywords=set())
+    assert site == []
+
+
+def test_title_change_rerenders_without_diff_file(site):
+    index = build(catalog(), {"pages": {}})
+    site.clear()
+    # 匹配到的 id 不变，只改了标题 / 链接
+    index = build(catalog(title1="剧本杀合集（新版）"), index, changed_keywords=set())
+    assert site == ["剧本杀"]
+    site.clear()
+    build(catalog(title1="剧本杀合集（新版）", link1="z"), index, changed_keywords=set())
+    assert site == ["剧本杀"]
+
+
+def test_stale_resource_ids_not_reused_when_catalog_changes(site):
+    index = build(catalog(), {"pages": {}})
+    resources = catalog() + [Resource("4", "剧本杀番外", [], [], LINK + "d")]
+    new = build(resources, index, changed_keywords=set())
+    assert new["pages"]["剧本杀"]["resource_ids"] == ["1", "2", "4"]
+
+
+def test_missing_page_file_is_rendered(site, tmp_path):
+    index = build(catalog(), {"pages": {}})
+    os.remove(os.path.join(str(tmp_path), index["pages"]["英语"]["file"]))
+    site.clear()
+    build(catalog(), index, changed_keywords=set())
+    assert site == ["英语"]
+
+
+def test_pages_no_longer_generated_are_removed(site, tmp_path):
+    index = build(catalog(), {"pages": {}})
+    english = os.path.join(str(tmp_path), index["pages"]["英语"]["file"])
+    # 没有统计快照（dropped_keywords 为空）也要删除跌出热门的页面
+    new = build(catalog(), index, hot=(("剧本杀", 30),))
+    assert seo.remove_stale_pages(index["pages"], new["pages"]) == [index["pages"]["英语"]["file"]]
+    assert not os.path.exists(english)
+    assert os.path.exists(os.path.join(str(tmp_path), new["pages"]["剧本杀"]["file"]))
+
+
+def test_pages_without_matching_resources_are_removed(site, tmp_path):
+    index = build(catalog(), {"pages": {}})
+    english = os.path.join(str(tmp_path), index["pages"]["英语"]["file"])
+    # 仍是热门，但资源已被删除
+    new = build(catalog()[:2], index)
+    assert "英语" not in new["pages"]
+    seo.remove_stale_pages(index["pages"], new["pages"])
+    assert not os.path.exists(english)
+
+
+# ---------- 相似关键词合并 ----------
+
+def test_cluster_merges_at_threshold():
+    matches = [("a", 30, ["1", "2", "3", "4"]), ("b", 20, ["1", "2", "3", "4", "5"]), ("c", 10, ["1", "2", "3"])]
+    # b: 4/5 = 0.8 合并；c: 3/4 = 0.75 不合并
+    assert seo.cluster_keywords(matches, 0.8) == {"a": "a", "b": "a", "c": "c"}
+    assert seo.cluster_keywords(matches, 0.75) == {"a": "a", "b": "a", "c": "a"}
+
+
+def test_cluster_without_shared_resources_not_merged():
+    # 没有共同资源的不比较，阈值为 0 也不合并
+    matches = [("a", 30, ["1"]), ("b", 20, ["2"])]
+    assert seo.cluster_keywords(matches, 0.0) == {"a": "a", "b": "b"}
+
+
+def test_cluster_joins_first_similar_head_by_count():
+    matches = [("a", 30, ["1", "2"]), ("b", 25, ["3", "4"]), ("c", 20, ["1", "2", "3", "4"])]
+    assert seo.cluster_keywords(matches, 0.5) == {"a": "a", "b": "b", "c": "a"}
+
+
+@pytest.fixture
+def redirects(site, monkeypatch):
+    made = []
+    original = seo.generate_redirect_page
+
+    def counting(keyword, count, canonical):
+        made.append(keyword)
+        return original(keyword, count, canonical)
+
+    monkeypatch.setattr(seo, "generate_redirect_page", counting)
+    return made
+
+
+def read_page(tmp_path, page):
+    with open(os.path.join(str(tmp_path), page["file"]), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_similar_keyword_becomes_redirect(site, redirects, tmp_path):
+    # “剧本”与“剧本杀”都匹配资源 1、2
+    index = build(catalog(), {"pages": {}}, hot=(("剧本杀", 30), ("剧本", 20)))
+    assert site == ["剧本杀"]
+    assert redirects == ["剧本"]
+    assert index["pages"]["剧本"]["canonical"] == "剧本杀"
+    assert index["pages"]["剧本杀"]["file"] in read_page(tmp_path, index["pages"]["剧本"])
+
+
+def test_up_to_date_redirect_is_reused(site, redirects):
+    hot = (("剧本杀", 30), ("剧本", 20))
+    index = build(catalog(), {"pages": {}}, hot=hot)
+    site.clear()
+    redirects.clear()
+    again = build(catalog(), index, changed_keywords=set(), hot=hot)
+    assert (site, redirects) == ([], [])
+    assert again["pages"]["剧本"] == index["pages"]["剧本"]
+
+    # 跳转页的搜索次数变了才重新生成
+    build(catalog(), again, changed_keywords={"剧本"}, hot=(("剧本杀", 30), ("剧本", 21)))
+    assert (site, redirects) == ([], ["剧本"])
+
+
+def test_redirect_turns_back_into_page_when_counts_flip(site, redirects, tmp_path):
+    index = build(catalog(), {"pages": {}}, hot=(("剧本杀", 30), ("剧本", 20)))
+    site.clear()
+    redirects.clear()
+    flipped = build(catalog(), index, changed_keywords={"剧本"}, hot=(("剧本", 40), ("剧本杀", 30)))
+    assert site == ["剧本"]
+    assert redirects == ["剧本杀"]
+    assert "canonical" not in flipped["pages"]["剧本"]
+    assert flipped["pages"]["剧本杀"]["canonical"] == "剧本"
+    assert "http-equiv=\"refresh\"" not in read_page(tmp_path, flipped["pages"]["剧本"])
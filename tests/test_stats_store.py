@@ -0,0 +1,21 @@
+from stats_store import StatsStore
+
+
+def test_deltas_and_crossings(tmp_path):
+    store = StatsStore(str(tmp_path / "stats.db"))
+    store.append_snapshot({"a": 5, "b": 1, "same": 3}, taken_at="2026-01-01T00:00:00+00:00")
+    store.append_snapshot({"a": 1, "b": 6, "c": 2, "same": 3}, taken_at="2026-01-02T00:00:00+00:00")
+
+    assert store.deltas() == {"a": (5, 1), "b": (1, 6), "c": (0, 2)}
+    assert store.crossings(3) == (["b"], ["a"])
+    assert store.trend("a") == [("2026-01-01T00:00:00+00:00", 5), ("2026-01-02T00:00:00+00:00", 1)]
+    assert store.trend("c")[0][1] == 0
+    store.close()
+
+
+def test_first_snapshot_counts_everything_as_new(tmp_path):
+    store = StatsStore(str(tmp_path / "stats.db"))
+    assert store.deltas() == {}
+    store.append_snapshot({"a": 2, "bad": "x"})
+    assert store.deltas() == {"a": (0, 2)}
+    store.close()